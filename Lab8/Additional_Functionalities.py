@@ -1,9 +1,7 @@
-import logging
-from logging_module import Logger
-from trip_management import TripManager
-from passengers import Passenger
-from dispatcher_module import Dispatcher
-from error_handling import TaxiNotAvailableException
+from Logging_Module import Logger
+from Passengers import Passenger
+from taxi_system import Dispatcher
+from timing_wheel import TimingWheel
 import random
 import time
 
@@ -50,10 +48,13 @@ class Taxi:
             Logger.log_warning(f"Taxi {self.taxi_id} has no current trip to complete.")
 
 class EnhancedDispatcher(Dispatcher):
+    REQUEST_TIMEOUT = 300  # Seconds a queued request waits for a taxi before it is dropped
+
     def __init__(self):
         super().__init__()
         self.available_taxis = [Taxi(i) for i in range(5)]  # Create 5 taxis for the dispatcher
-        self.passenger_requests = []
+        self.passenger_requests = {}  # Queued passenger -> request timeout timer
+        self.timers = TimingWheel()
 
     def find_available_taxi(self):
         for taxi in self.available_taxis:
@@ -65,15 +66,25 @@ class EnhancedDispatcher(Dispatcher):
         Logger.log_info(f"Dispatching taxi for {passenger.name}.")
         taxi = self.find_available_taxi()
         if taxi:
+            timeout = self.passenger_requests.pop(passenger, None)
+            if timeout is not None:
+                self.timers.cancel(timeout)
             ride = Ride(passenger, passenger.pickup_location, passenger.destination)
             taxi.assign_trip(ride)
             self.trip_manager.start_trip(ride, self)
         else:
             Logger.log_error("No taxis available.")
-            self.passenger_requests.append(passenger)
+            if passenger not in self.passenger_requests:
+                self.passenger_requests[passenger] = self.timers.schedule(
+                    EnhancedDispatcher.REQUEST_TIMEOUT, self.expire_request, passenger)
+
+    def expire_request(self, passenger: Passenger):
+        if self.passenger_requests.pop(passenger, None) is not None:
+            Logger.log_error(f"Request from {passenger.name} timed out waiting for a taxi.")
 
     def handle_passenger_requests(self):
-        for passenger in self.passenger_requests:
+        self.timers.advance()
+        for passenger in list(self.passenger_requests):
             self.dispatch_taxi(passenger)
 
 class RideShare(Ride):
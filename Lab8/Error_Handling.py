@@ -1,6 +1,7 @@
 import logging
-from logging_module import Logger
+from Logging_Module import Logger
 import random
+import uuid
 
 # Exception Definitions
 class TaxiAppException(Exception):
@@ -25,6 +26,7 @@ class User:
     def __init__(self, name: str, user_type: str):
         self.name = name
         self.user_type = user_type  # Either 'passenger' or 'driver'
+        self.user_id = uuid.uuid4().hex  # Stable identity; names are not unique
 
     def __str__(self):
         return f"{self.user_type.capitalize()}: {self.name}"
@@ -58,6 +60,7 @@ class Trip:
         self.status = 'pending'
         self.distance = 0.0  # Distance in kilometers
         self.fare = 0.0
+        self.payment_key = uuid.uuid4().hex  # Idempotency key for settling this trip's fare
 
     def start_trip(self):
         Logger.log_info(f"Trip started from {self.passenger.pickup_location} to {self.passenger.destination}.")
@@ -119,16 +122,65 @@ class Dispatcher:
             Logger.log_warning(f"Taxi {taxi.name} has no current trip to complete.")
 
 class LocationService:
+    VALID_LOCATIONS = frozenset(["North", "South", "East", "West", "Central"])
+    geofences = None  # GeofenceIndex set by load_geofences() for coordinate validation
+
     @staticmethod
     def validate_location(location: str):
         # Simulated location validation
-        valid_locations = ["North", "South", "East", "West", "Central"]
-        if location not in valid_locations:
+        if location not in LocationService.VALID_LOCATIONS:
             Logger.log_error(f"Invalid location: {location}")
             raise InvalidLocationException(location)
         Logger.log_info(f"Location {location} is valid.")
 
+    @staticmethod
+    def load_geofences(path: str):
+        """Load city polygons (GeoJSON) used to validate coordinates."""
+        from geofence import GeofenceIndex
+        LocationService.geofences = GeofenceIndex.from_geojson(path)
+        Logger.log_info(f"Loaded {len(LocationService.geofences.polygons)} geofence polygons.")
+        return LocationService.geofences
+
+    @staticmethod
+    def validate_point(x: float, y: float):
+        """Validate a pickup coordinate against the loaded service-area polygons."""
+        geofences = LocationService.geofences
+        if geofences is None or not geofences.is_serviceable(geofences.zones_at(x, y)):
+            Logger.log_error(f"Invalid location: ({x}, {y})")
+            raise InvalidLocationException((x, y))
+
+    @staticmethod
+    def validate_points(points: list):
+        """Validate many (x, y) coordinates in one call; returns a list of booleans."""
+        if LocationService.geofences is None:
+            return [False] * len(points)
+        return LocationService.geofences.validate_points(points)
+
 class PaymentService:
+    pipeline = None  # Set by start_pipeline() to settle fares asynchronously
+
+    @staticmethod
+    def start_pipeline(processor=None, **options):
+        """Start settling submitted fares in background batches."""
+        from payment_pipeline import PaymentPipeline
+        PaymentService.pipeline = PaymentPipeline(processor, **options)
+        return PaymentService.pipeline
+
+    @staticmethod
+    def stop_pipeline():
+        """Drain outstanding payments, including retries, and stop the pipeline."""
+        if PaymentService.pipeline is not None:
+            PaymentService.pipeline.close()
+            PaymentService.pipeline = None
+
+    @staticmethod
+    def submit_payment(idempotency_key: str, fare: float):
+        """Queue a fare without waiting for it to settle; falls back to process_payment with no pipeline."""
+        if PaymentService.pipeline is None:
+            PaymentService.process_payment(fare)
+            return True
+        return PaymentService.pipeline.submit(idempotency_key, fare)
+
     @staticmethod
     def process_payment(fare: float):
         Logger.log_info(f"Processing payment for amount: ${fare}")
@@ -169,12 +221,14 @@ def main():
         dispatcher.complete_trip(driver)
 
     # Process payments for completed trips
+    PaymentService.start_pipeline()
     for passenger in passengers:
         if passenger.current_trip and passenger.current_trip.status == 'completed':
             try:
-                PaymentService.process_payment(passenger.current_trip.fare)
+                PaymentService.submit_payment(passenger.current_trip.payment_key, passenger.current_trip.fare)
             except ValueError as e:
                 Logger.log_error(e)
+    PaymentService.stop_pipeline()
 
 if __name__ == "__main__":
     main()
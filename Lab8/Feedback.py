@@ -1,9 +1,10 @@
+from __future__ import annotations
 import random
 import datetime
 import logging
-
-# Assuming Logger is defined elsewhere in logging_module
-# import from logging_module import Logger
+import uuid
+from Logging_Module import Logger
+from Error_Handling import Driver, Passenger, User
 
 class FeedbackManager:
     @staticmethod
@@ -11,7 +12,21 @@ class FeedbackManager:
         # Simulate feedback collection
         feedback = random.randint(1, 5)
         print(f"Passenger gave a feedback of {feedback} to Taxi {taxi.taxi_id}")
+        trip = taxi.current_trip
+        from feedback_pipeline import FeedbackPipeline
+        if FeedbackPipeline.active is None:
+            FeedbackManager.apply_feedback(taxi, trip, feedback)
+            return
+        # Apply the rating off the completion path; the trip key dedupes redelivery
+        FeedbackPipeline.active.submit(FeedbackPipeline.trip_key("driver", trip),
+                                       FeedbackManager.apply_feedback, taxi, trip, feedback)
+
+    @staticmethod
+    def apply_feedback(taxi, trip, feedback: int):
+        """Update the driver's rating and, for trips that track it, the trip's own rating."""
         taxi.receive_feedback(feedback)
+        if hasattr(trip, "record_rating"):
+            trip.record_rating(feedback)
 
 class UserProfile:
     def __init__(self, user: User):
@@ -69,8 +84,33 @@ class EnhancedPassenger(Passenger):
         self.profile.add_feedback(feedback)
 
 class NotificationService:
+    queue = None  # Set by start_queue() to deliver notifications in the background
+    TRIP_STATUS = "trip_status"  # Topic for dispatched/arriving/arrived updates; only the latest is delivered
+
     @staticmethod
-    def send_notification(user: User, message: str):
+    def start_queue(transport=None, **options):
+        """Queue notifications for coalesced, batched delivery instead of sending inline."""
+        from notification_queue import NotificationQueue
+        NotificationService.queue = NotificationQueue(transport, **options)
+        return NotificationService.queue
+
+    @staticmethod
+    def stop_queue():
+        """Deliver pending notifications, log delivery lag and stop the queue."""
+        queue = NotificationService.queue
+        if queue is not None:
+            queue.close()
+            NotificationService.queue = None
+            lag = queue.lag_metrics()
+            Logger.log_info(f"Notifications: {queue.sent} sent, {queue.coalesced} coalesced, "
+                            f"lag p50 {lag['p50'] * 1000:.1f} ms, p99 {lag['p99'] * 1000:.1f} ms")
+
+    @staticmethod
+    def send_notification(user: User, message: str, topic: str = None):
+        """Notify a user; messages sharing a topic (e.g. trip status) may coalesce while queued."""
+        if NotificationService.queue is not None:
+            NotificationService.queue.send(user, message, topic)
+            return
         Logger.log_info(f"Sending notification to {user.name}: {message}")
 
 class Trip:
@@ -82,6 +122,7 @@ class Trip:
         self.fare = 0.0
         self.start_time = None
         self.end_time = None
+        self.payment_key = uuid.uuid4().hex  # Idempotency key for settling this trip's fare
 
     def start_trip(self):
         Logger.log_info(f"Trip started from {self.passenger.pickup_location} to {self.passenger.destination}.")
@@ -130,7 +171,8 @@ class Dispatcher:
             trip.start_trip()
             passenger.current_trip = trip
             self.available_taxis.remove(available_driver)
-            NotificationService.send_notification(passenger, "Taxi has been dispatched to your location.")
+            NotificationService.send_notification(passenger, "Taxi has been dispatched to your location.",
+                                                  NotificationService.TRIP_STATUS)
         else:
             Logger.log_error("No taxis available.")
             raise TaxiNotAvailableException()
@@ -155,6 +197,9 @@ class MainApp:
 
     def run(self):
         Logger.log_info("Starting Taxi App...")
+        from feedback_pipeline import FeedbackPipeline
+        NotificationService.start_queue()
+        FeedbackPipeline.start()
 
         # Create and add drivers
         self.dispatcher.add_driver(EnhancedDriver("Alice", 1))
@@ -183,10 +228,11 @@ class MainApp:
             self.dispatcher.complete_trip(driver)
 
         # Process payments for completed trips
+        PaymentService.start_pipeline()
         for passenger in passengers:
             if passenger.current_trip and passenger.current_trip.status == 'completed':
                 try:
-                    PaymentService.process_payment(passenger.current_trip.fare)
+                    PaymentService.submit_payment(passenger.current_trip.payment_key, passenger.current_trip.fare)
                 except ValueError as e:
                     Logger.log_error(e)
 
@@ -199,6 +245,11 @@ class MainApp:
             Logger.log_info(f"{driver.name}'s Trip History:")
             driver.trip_history.display_history()
 
+        FeedbackPipeline.stop()
+        PaymentService.stop_pipeline()
+        NotificationService.stop_queue()
+        Logger.flush_suppressed()
+
 if __name__ == "__main__":
     app = MainApp()
     app.run()
@@ -1,6 +1,9 @@
 import logging
 import os
+import random
 import sys
+import threading
+import time
 from logging.handlers import RotatingFileHandler, SMTPHandler
 
 # Define constants for log file configuration
@@ -9,9 +12,10 @@ LOG_FILE = "app.log"
 MAX_LOG_SIZE = 5 * 1024 * 1024  # 5 MB
 BACKUP_COUNT = 3
 
-# Ensure the log directory exists
-if not os.path.exists(LOG_DIR):
-    os.makedirs(LOG_DIR)
+# Define constants for per-call-site log rate limiting
+RATE_LIMIT_PER_SECOND = 5.0  # Sustained messages per second allowed from one call site
+RATE_LIMIT_BURST = 20  # Messages a call site may emit at once before limiting starts
+SAMPLE_RATE = 0.01  # Fraction of over-limit messages still emitted as samples
 
 class CustomFormatter(logging.Formatter):
     """Custom logging formatter to enhance log output."""
@@ -21,12 +25,67 @@ class CustomFormatter(logging.Formatter):
         formatter = logging.Formatter(log_fmt)
         return formatter.format(record)
 
+class RateLimitFilter(logging.Filter):
+    """Token-bucket rate limiting and sampling of log records, per call site.
+
+    Each (file, line) gets its own bucket. Within the budget every record is
+    kept; beyond it, records are kept with probability `sample_rate` and the
+    rest are counted. The next record kept from that site carries the exact
+    number suppressed since the previous one. Warnings and above always pass.
+    """
+
+    def __init__(self, rate: float = RATE_LIMIT_PER_SECOND, burst: int = RATE_LIMIT_BURST,
+                 sample_rate: float = SAMPLE_RATE):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.sample_rate = sample_rate
+        self.sites = {}  # (pathname, lineno) -> [tokens, last refill time, suppressed count]
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self.lock:
+            site = self.sites.get(key)
+            if site is None:
+                site = self.sites[key] = [float(self.burst), now, 0]
+            site[0] = min(self.burst, site[0] + (now - site[1]) * self.rate)
+            site[1] = now
+            if site[0] >= 1.0:
+                site[0] -= 1.0
+            elif random.random() >= self.sample_rate:
+                site[2] += 1
+                return False
+            suppressed, site[2] = site[2], 0
+        if suppressed:
+            record.msg = f"{record.msg} [{suppressed} similar messages suppressed]"
+        return True
+
+    def suppressed_summary(self):
+        """Return and reset the suppressed counts not yet reported, per (file, line)."""
+        with self.lock:
+            summary = {key: site[2] for key, site in self.sites.items() if site[2]}
+            for key in summary:
+                self.sites[key][2] = 0
+        return summary
+
 class Logger:
     """Logger class to encapsulate logging functionality."""
-    
+
+    rate_limiter = RateLimitFilter()
+
+    logger = None  # Created by setup_logging() on first use, not at import time
+
     @staticmethod
     def setup_logging():
         """Set up logging configuration."""
+        # Ensure the log directory exists
+        if not os.path.exists(LOG_DIR):
+            os.makedirs(LOG_DIR)
+
         # Create a logger
         logger = logging.getLogger("TaxiAppLogger")
         logger.setLevel(logging.DEBUG)
@@ -58,28 +117,50 @@ class Logger:
         smtp_handler.setFormatter(CustomFormatter())
         logger.addHandler(smtp_handler)
 
+        # Bound repetitive debug/info lines per call site; warnings and errors always pass
+        logger.addFilter(Logger.rate_limiter)
+
         Logger.logger = logger  # Store the logger as a static variable
 
+    @staticmethod
+    def get_logger():
+        """Return the shared logger, setting up handlers on first use."""
+        if Logger.logger is None:
+            Logger.setup_logging()
+        return Logger.logger
+
+    # stacklevel=2 attributes each record to the caller, which is the rate limiter's call site key
     @staticmethod
     def log_info(message: str):
-        Logger.logger.info(message)
+        Logger.get_logger().info(message, stacklevel=2)
 
     @staticmethod
     def log_debug(message: str):
-        Logger.logger.debug(message)
+        Logger.get_logger().debug(message, stacklevel=2)
+
+    @staticmethod
+    def log_warning(message: str):
+        Logger.get_logger().warning(message, stacklevel=2)
 
     @staticmethod
     def log_error(message: str):
-        Logger.logger.error(message)
+        Logger.get_logger().error(message, stacklevel=2)
 
     @staticmethod
     def log_critical(message: str):
-        Logger.logger.critical(message)
+        Logger.get_logger().critical(message, stacklevel=2)
+
+    @staticmethod
+    def flush_suppressed():
+        """Log a summary line for every call site with suppressed messages not yet reported."""
+        for (pathname, lineno), count in Logger.rate_limiter.suppressed_summary().items():
+            Logger.get_logger().warning(f"{count} messages suppressed from {os.path.basename(pathname)}:{lineno}")
 
 class Application:
     """Main application class to demonstrate logging functionality."""
 
-    def __init__(self):
+    def __init__(self, analytics=None):
+        self.analytics = analytics  # TripAnalytics to report on, e.g. Dispatcher.analytics
         self.setup_logging()
 
     def setup_logging(self):
@@ -96,6 +177,8 @@ class Application:
         except Exception as e:
             Logger.log_error(f"An error occurred: {e}")
             self.handle_critical_error(e)
+        finally:
+            Logger.flush_suppressed()  # Report suppressed counts still pending at shutdown
 
     def perform_operations(self):
         """Simulate some application operations."""
@@ -114,12 +197,24 @@ class Application:
         Logger.log_critical(f"Handling critical error: {error}")
         # Here you could add more recovery logic or notifications
 
-    def generate_report(self):
-        """Generate a report of application activities."""
+    def generate_report(self, analytics=None):
+        """Generate a report of application activities from a TripAnalytics store, if given."""
         Logger.log_info("Generating report...")
-        # Simulate report generation logic
-        for i in range(3):
-            Logger.log_info(f"Report section {i + 1}: Data processed.")
+        if analytics is None:
+            analytics = self.analytics
+        if analytics is None:
+            # Simulate report generation logic
+            for i in range(3):
+                Logger.log_info(f"Report section {i + 1}: Data processed.")
+        else:
+            refreshed = analytics.refresh()
+            Logger.log_info(f"Report section 1: {analytics.rows} trips ({refreshed} new since last report).")
+            top_revenue = sorted(analytics.revenue_per_driver_hour().items(), key=lambda item: -item[1])[:10]
+            for (driver, hour), revenue in top_revenue:
+                Logger.log_info(f"Report section 1: {driver} earned ${revenue:.2f} in hour starting {hour}.")
+            for zone, rate in sorted(analytics.fail_rate_per_zone().items()):
+                Logger.log_info(f"Report section 2: {zone} fail rate {rate:.1%}.")
+            Logger.log_info(f"Report section 3: rating distribution {analytics.rating_distribution()}.")
 
         Logger.log_info("Report generation complete.")
 
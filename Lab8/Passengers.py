@@ -1,13 +1,15 @@
 import random
 import time
+import uuid
 from trip_management import Trip
-from error_handling import TaxiNotAvailableException
+from Error_Handling import TaxiNotAvailableException
 
 class Passenger:
     """Class representing a passenger who requests taxis."""
     
     def __init__(self, name: str, pickup_location: str, destination: str):
         self.name = name
+        self.user_id = uuid.uuid4().hex  # Stable identity for per-rider promo codes; names are not unique
         self.pickup_location = pickup_location
         self.destination = destination
         self.current_trip = None
@@ -24,8 +26,13 @@ class Passenger:
         """Allow the passenger to provide feedback on their trip."""
         if self.current_trip and not self.feedback_given:
             print(f"{self.name} provided feedback: {rating}/5 - {comments}")
-            self.current_trip.record_feedback(rating, comments)
             self.feedback_given = True
+            from feedback_pipeline import FeedbackPipeline
+            if FeedbackPipeline.active is not None:
+                FeedbackPipeline.active.submit(FeedbackPipeline.trip_key("passenger", self.current_trip),
+                                               self.current_trip.record_feedback, rating, comments)
+            else:
+                self.current_trip.record_feedback(rating, comments)
         else:
             print(f"{self.name} cannot provide feedback at this time.")
 
@@ -40,12 +47,34 @@ class Trip:
         self.status = "Pending"  # Status can be "Pending", "In Progress", "Completed", "Cancelled"
         self.rating = None
         self.comments = ""
+        self.timer = None  # Pending expiry or auto-complete timer, if scheduled
 
-    def start_trip(self):
-        """Start the trip."""
+    def start_trip(self, timers=None):
+        """Start the trip; with a TimingWheel, completion is scheduled instead of slept through."""
         print(f"Trip {self.trip_id} has started for {self.passenger.name}.")
         self.status = "In Progress"
-        self.simulate_trip_duration()
+        if timers is None:
+            self.simulate_trip_duration()
+            return
+        if self.timer is not None:
+            timers.cancel(self.timer)
+        self.timer = timers.schedule(random.randint(10, 30), self.complete_trip)
+
+    def expire_after(self, timers, delay: float, reason: str = "request timed out"):
+        """Cancel the trip if it is still pending after `delay` seconds, replacing any earlier deadline."""
+        self.clear_deadline(timers)
+        self.timer = timers.schedule(delay, self.expire, reason)
+
+    def clear_deadline(self, timers):
+        if self.timer is not None:
+            timers.cancel(self.timer)
+            self.timer = None
+
+    def expire(self, reason: str):
+        self.timer = None
+        if self.status == "Pending":
+            print(f"Trip {self.trip_id} expired while pending: {reason}.")
+            self.cancel_trip()
 
     def complete_trip(self):
         """Complete the trip."""
@@ -79,10 +108,16 @@ class Trip:
 class BookingSystem:
     """Class to manage taxi bookings and passenger requests."""
 
+    ACCEPT_TIMEOUT = 15  # Seconds a driver has to accept a request before it expires
+    NO_SHOW_TIMEOUT = 60  # Seconds a taxi waits at the pickup before the passenger is a no-show
+
     def __init__(self):
         self.passengers = []
         self.trips = []
         self.taxis_available = 5  # Simulate 5 available taxis
+        from timing_wheel import TimingWheel
+        self.timers = TimingWheel()
+        self.active_trips = []  # Trips holding a taxi until they complete or expire
 
     def add_passenger(self, passenger: Passenger):
         """Add a new passenger to the system."""
@@ -94,14 +129,53 @@ class BookingSystem:
         if self.taxis_available > 0:
             trip = passenger.request_taxi()
             self.trips.append(trip)
+            self.active_trips.append(trip)
             self.taxis_available -= 1
             print(f"Taxi assigned for {passenger.name}. Taxis available: {self.taxis_available}")
-            trip.start_trip()
-            trip.complete_trip()
-            self.taxis_available += 1  # Free up taxi after trip
+            # Trips run on the timing wheel instead of blocking here until they finish
+            trip.expire_after(self.timers, BookingSystem.ACCEPT_TIMEOUT, "no driver accepted")
+            self.timers.schedule(random.randint(1, 20), self.accept, trip)  # Simulated driver response
         else:
             print("No taxis available right now. Please wait.")
 
+    def accept(self, trip: Trip):
+        """The driver accepts: stop the accept deadline and drive to the pickup."""
+        if trip.status == "Pending":
+            trip.clear_deadline(self.timers)
+            print(f"Driver accepted trip {trip.trip_id}.")
+            self.timers.schedule(random.randint(1, 5), self.arrive, trip)  # Simulated drive to the pickup
+
+    def arrive(self, trip: Trip):
+        """The taxi is at the pickup: the passenger has NO_SHOW_TIMEOUT seconds to board."""
+        if trip.status == "Pending":
+            print(f"Taxi for trip {trip.trip_id} arrived at {trip.pickup_location}.")
+            trip.expire_after(self.timers, BookingSystem.NO_SHOW_TIMEOUT, "passenger did not show up")
+            self.timers.schedule(random.randint(0, 80), self.pick_up, trip)  # Simulated passenger boarding
+
+    def pick_up(self, trip: Trip):
+        """Start the trip when the passenger boards, unless it already expired."""
+        if trip.status == "Pending":
+            trip.start_trip(self.timers)
+
+    def tick(self, now: float = None):
+        """Fire due trip timers, apply queued feedback and free the taxis of trips that completed or expired."""
+        self.timers.advance(now)
+        from feedback_pipeline import FeedbackPipeline
+        FeedbackPipeline.drain_active()  # Apply queued ratings on this thread, alongside the trips they describe
+        still_active = []
+        for trip in self.active_trips:
+            if trip.status in ("Completed", "Cancelled"):
+                self.taxis_available += 1
+            else:
+                still_active.append(trip)
+        self.active_trips = still_active
+
+    def run_until_idle(self):
+        """Drive the timing wheel until every requested trip has completed or expired."""
+        while self.active_trips:
+            self.tick()
+            time.sleep(self.timers.tick)
+
     def handle_passenger_feedback(self, passenger: Passenger):
         """Handle feedback from a passenger."""
         if passenger.current_trip:
@@ -113,7 +187,9 @@ class BookingSystem:
 
 # Simulating the entire passenger and trip management system
 def simulate_taxi_service():
+    from feedback_pipeline import FeedbackPipeline
     booking_system = BookingSystem()
+    FeedbackPipeline.start()
 
     # Create some passengers
     passengers = [
@@ -131,10 +207,12 @@ def simulate_taxi_service():
     # Request taxis for each passenger
     for passenger in passengers:
         booking_system.request_taxi_for_passenger(passenger)
+    booking_system.run_until_idle()
 
     # Handle feedback for passengers
     for passenger in passengers:
         booking_system.handle_passenger_feedback(passenger)
+    FeedbackPipeline.stop()
 
 if __name__ == "__main__":
     simulate_taxi_service()
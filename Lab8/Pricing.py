@@ -1,9 +1,18 @@
+from __future__ import annotations
 import logging
 from datetime import datetime
 import random
 
-# Setting up logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+class _RateLimit(logging.Filter):
+    """Defers to Logger.rate_limiter, importing Logging_Module on the first record instead of at import."""
+
+    def filter(self, record):
+        from Logging_Module import Logger
+        return Logger.rate_limiter.filter(record)
+
+# Per-call-site rate limiting applies wherever PricingEngine is imported, not only when run as a script
+logger = logging.getLogger(__name__)
+logger.addFilter(_RateLimit())
 
 class PricingEngine:
     BASE_FARE = 2.50
@@ -13,9 +22,18 @@ class PricingEngine:
         "WELCOME10": 0.10,  # 10% discount
         "SUMMER20": 0.20,   # 20% discount
     }
+    promo_store = None  # PromoCodeStore for campaign codes, set by load_promo_codes()
+
+    @staticmethod
+    def load_promo_codes(path: str):
+        """Map a promo code store built with PromoCodeStore.build."""
+        from promo_codes import PromoCodeStore
+        PricingEngine.promo_store = PromoCodeStore.open(path)
+        logger.info(f"Loaded {PricingEngine.promo_store.count} promo codes.")
+        return PricingEngine.promo_store
 
     @staticmethod
-    def calculate_fare(pickup_location: str, destination: str, discount_code: str = None):
+    def calculate_fare(pickup_location: str, destination: str, discount_code: str = None, user_id: str = None):
         """Calculate the fare based on the pickup location and destination."""
         distance = PricingEngine.estimate_distance(pickup_location, destination)
         fare = PricingEngine.BASE_FARE + (distance * PricingEngine.COST_PER_MILE)
@@ -25,9 +43,9 @@ class PricingEngine:
 
         # Apply discount if provided
         if discount_code:
-            fare *= (1 - PricingEngine.get_discount(discount_code))
+            fare *= (1 - PricingEngine.get_discount(discount_code, user_id))
         
-        logging.info(f"Calculated fare for trip from {pickup_location} to {destination}: ${fare:.2f}")
+        logger.info(f"Calculated fare for trip from {pickup_location} to {destination}: ${fare:.2f}")
         return fare
 
     @staticmethod
@@ -46,15 +64,19 @@ class PricingEngine:
         """Determine if surge pricing should be applied."""
         current_hour = datetime.now().hour
         if 17 <= current_hour <= 19:  # Example peak hours
-            logging.info("Surge pricing is in effect.")
+            logger.info("Surge pricing is in effect.")
             return PricingEngine.PEAK_HOUR_MULTIPLIER
-        logging.info("Normal pricing is in effect.")
+        logger.info("Normal pricing is in effect.")
         return 1.0
 
     @staticmethod
-    def get_discount(code: str):
-        """Get discount percentage based on the code provided."""
-        return PricingEngine.DISCOUNT_CODES.get(code, 0.0)
+    def get_discount(code: str, user_id: str = None):
+        """Get discount percentage based on the code provided, redeeming campaign codes."""
+        if code in PricingEngine.DISCOUNT_CODES:
+            return PricingEngine.DISCOUNT_CODES[code]
+        if PricingEngine.promo_store is not None:
+            return PricingEngine.promo_store.redeem(code, user_id)
+        return 0.0
 
 class Trip:
     """Class representing a trip with fare calculations."""
@@ -69,12 +91,13 @@ class Trip:
 
     def calculate_fare(self):
         """Calculate fare for the trip using the PricingEngine."""
-        self.fare = PricingEngine.calculate_fare(self.pickup_location, self.destination, self.discount_code)
-        logging.debug(f"Trip {self.trip_id} fare calculated: ${self.fare:.2f}")
+        self.fare = PricingEngine.calculate_fare(self.pickup_location, self.destination, self.discount_code,
+                                                 self.passenger.user_id)
+        logger.debug(f"Trip {self.trip_id} fare calculated: ${self.fare:.2f}")
 
     def start_trip(self):
         """Start the trip and calculate fare."""
-        logging.info(f"Trip {self.trip_id} started for {self.passenger.name}.")
+        logger.info(f"Trip {self.trip_id} started for {self.passenger.name}.")
         self.calculate_fare()
 
 class BookingSystem:
@@ -88,7 +111,7 @@ class BookingSystem:
     def add_passenger(self, passenger: Passenger):
         """Add a new passenger to the system."""
         self.passengers.append(passenger)
-        logging.info(f"Passenger {passenger.name} added to the system.")
+        logger.info(f"Passenger {passenger.name} added to the system.")
 
     def request_taxi_for_passenger(self, passenger: Passenger, discount_code: str = None):
         """Handle taxi requests for a passenger."""
@@ -96,14 +119,15 @@ class BookingSystem:
             trip = Trip(random.randint(1000, 9999), passenger, passenger.pickup_location, passenger.destination, discount_code)
             self.trips.append(trip)
             self.taxis_available -= 1
-            logging.info(f"Taxi assigned for {passenger.name}. Taxis available: {self.taxis_available}")
+            logger.info(f"Taxi assigned for {passenger.name}. Taxis available: {self.taxis_available}")
             trip.start_trip()
-            logging.info(f"Trip {trip.trip_id} completed for {passenger.name}. Fare: ${trip.fare:.2f}")
+            logger.info(f"Trip {trip.trip_id} completed for {passenger.name}. Fare: ${trip.fare:.2f}")
             self.taxis_available += 1  # Free up taxi after trip
         else:
-            logging.warning("No taxis available right now. Please wait.")
+            logger.warning("No taxis available right now. Please wait.")
 
 def simulate_taxi_service():
+    from Passengers import Passenger
     booking_system = BookingSystem()
 
     # Create some passengers
@@ -125,4 +149,8 @@ def simulate_taxi_service():
         booking_system.request_taxi_for_passenger(passenger, code)
 
 if __name__ == "__main__":
+    # Configure root logging only when run as a script, not when imported
+    logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
     simulate_taxi_service()
+    from Logging_Module import Logger
+    Logger.flush_suppressed()
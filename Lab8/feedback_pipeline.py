@@ -0,0 +1,121 @@
+import threading
+import uuid
+from collections import OrderedDict, deque
+
+# Define constants for feedback micro-batching
+BATCH_SIZE = 256  # Max feedback events applied per micro-batch
+MAX_ATTEMPTS = 5  # Deliveries before an event that keeps failing is dropped
+DEDUPE_WINDOW = 1_000_000  # Most recent applied keys remembered for deduplication
+
+class FeedbackPipeline:
+    """Applies ratings and comments to driver and passenger profiles off the completion path.
+
+    `submit` enqueues and returns immediately, from any thread. Queued events
+    are applied in micro-batches by `drain`, which the owner of the profiles
+    calls from its own loop (`Dispatcher.tick`, `BookingSystem.tick`): ratings
+    then change on the same thread as dispatch, snapshots and leaderboard
+    queries, so none of them needs a lock. Delivery is at-least-once: an event
+    whose apply raises is re-queued for the next drain until it succeeds or
+    runs out of attempts. Each event has a
+    dedupe key (e.g. ("driver", trip_id)) so a redelivered or resubmitted
+    event is applied once. Build keys with `trip_key`: trip IDs are reused, so
+    keying on them would drop a later trip's feedback as a duplicate.
+
+    Events live only in memory: the retry guarantee covers failing applies,
+    not a crash, which loses whatever is still queued.
+    """
+
+    active = None  # Pipeline used by FeedbackManager and Passenger, set with FeedbackPipeline.start()
+
+    def __init__(self, batch_size: int = BATCH_SIZE):
+        self.batch_size = batch_size
+        self.queue = deque()
+        self.applied_keys = OrderedDict()
+        self.applied = 0
+        self.duplicates = 0
+        self.failed = 0
+        self._closed = False
+        self._lock = threading.Lock()  # Guards the queue only; events are applied by the draining thread
+
+    @staticmethod
+    def start(**options):
+        FeedbackPipeline.active = FeedbackPipeline(**options)
+        return FeedbackPipeline.active
+
+    @staticmethod
+    def stop():
+        """Apply everything still queued and stop the active pipeline."""
+        if FeedbackPipeline.active is not None:
+            FeedbackPipeline.active.close()
+            FeedbackPipeline.active = None
+
+    @staticmethod
+    def drain_active():
+        """Apply the active pipeline's queued events, if one is running; returns the number applied."""
+        if FeedbackPipeline.active is not None:
+            return FeedbackPipeline.active.drain()
+        return 0
+
+    @staticmethod
+    def trip_key(role: str, trip):
+        """Dedupe key for `role`'s feedback on one trip, unique even when trip IDs repeat."""
+        if trip is None:
+            return (role, uuid.uuid4().hex)
+        key = getattr(trip, "feedback_key", None)
+        if key is None:
+            key = trip.feedback_key = uuid.uuid4().hex
+        return (role, key)
+
+    def submit(self, key, apply, *args):
+        """Queue apply(*args) to run once for this dedupe key."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Feedback pipeline is closed")
+            self.queue.append([key, apply, args, 0])
+
+    def drain(self):
+        """Apply the events queued so far, batch_size at a time; returns the number applied.
+
+        Events that fail are re-queued behind them and retried on the next drain.
+        """
+        applied = self.applied
+        with self._lock:
+            pending = len(self.queue)
+        while pending:
+            with self._lock:
+                batch = [self.queue.popleft() for _ in range(min(self.batch_size, pending))]
+            pending -= len(batch)
+            self._apply_batch(batch)
+        return self.applied - applied
+
+    def close(self):
+        """Stop accepting events and apply what is queued, retrying failures until they succeed or are dropped."""
+        with self._lock:
+            self._closed = True
+        while self.queue:
+            self.drain()
+
+    def _apply_batch(self, batch: list):
+        retry = []
+        for event in batch:
+            key, apply, args, attempts = event
+            if key in self.applied_keys:
+                self.duplicates += 1
+                continue
+            try:
+                apply(*args)
+            except Exception as e:
+                event[3] = attempts + 1
+                if event[3] < MAX_ATTEMPTS:
+                    retry.append(event)
+                else:
+                    print(f"Dropping feedback {key} after {event[3]} attempts: {e}")
+                    self.failed += 1
+                continue
+            self.applied += 1
+            self.applied_keys[key] = None
+            if len(self.applied_keys) > DEDUPE_WINDOW:
+                self.applied_keys.popitem(last=False)
+        if retry:
+            with self._lock:
+                self.queue.extend(retry)
@@ -0,0 +1,165 @@
+import multiprocessing
+import struct
+import sys
+from array import array
+from multiprocessing import resource_tracker, shared_memory
+
+# Shared fleet snapshot layout:
+#   header | zone name table | buffer 0 | buffer 1
+# Each buffer is: sequence | taxi count | one column per field, 8-byte aligned.
+# The publisher always writes the buffer readers are not directed to, then flips
+# `active`, so a reader only ever races with a writer after two publishes.
+MAGIC = b"TAXISHM1"
+HEADER = struct.Struct("<8sIIIIQ")  # magic, capacity, zone slots, active buffer, pad, version
+BUFFER_HEADER = struct.Struct("<QI4x")  # sequence (odd while being written), taxi count
+ZONE_NAME_SIZE = 32
+MAX_ZONES = 256
+COLUMNS = [
+    ("taxi_id", "q"),
+    ("zone", "i"),  # Index into the zone name table
+    ("available", "b"),
+    ("total_earnings", "d"),
+    ("rating", "d"),
+]
+MAX_READ_ATTEMPTS = 100
+
+def _align(size: int):
+    return size + (-size) % 8
+
+def _buffer_size(capacity: int):
+    return BUFFER_HEADER.size + sum(_align(capacity * array(code).itemsize) for _, code in COLUMNS)
+
+def _zone_table_offset():
+    return HEADER.size
+
+def _buffer_offset(capacity: int, buffer: int):
+    return _align(HEADER.size + MAX_ZONES * ZONE_NAME_SIZE) + buffer * _buffer_size(capacity)
+
+def _column_offsets(capacity: int, buffer: int):
+    offset = _buffer_offset(capacity, buffer) + BUFFER_HEADER.size
+    offsets = {}
+    for name, code in COLUMNS:
+        offsets[name] = offset
+        offset += _align(capacity * array(code).itemsize)
+    return offsets
+
+class FleetSnapshotPublisher:
+    """Publishes the dispatcher's fleet into a double-buffered shared memory segment."""
+
+    def __init__(self, name: str, capacity: int):
+        size = _buffer_offset(capacity, 2)
+        self.memory = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.capacity = capacity
+        self.zones = {}
+        self.active = 0
+        self.version = 0
+        self._write_header()
+
+    def _write_header(self):
+        HEADER.pack_into(self.memory.buf, 0, MAGIC, self.capacity, len(self.zones), self.active, 0, self.version)
+
+    def _zone_code(self, zone: str):
+        code = self.zones.get(zone)
+        if code is None:
+            if len(self.zones) >= MAX_ZONES:
+                raise ValueError(f"Fleet snapshot supports at most {MAX_ZONES} zones")
+            code = self.zones[zone] = len(self.zones)
+            encoded = zone.encode("utf-8")[:ZONE_NAME_SIZE]
+            offset = _zone_table_offset() + code * ZONE_NAME_SIZE
+            self.memory.buf[offset:offset + ZONE_NAME_SIZE] = encoded.ljust(ZONE_NAME_SIZE, b"\0")
+        return code
+
+    def publish(self, taxis: list):
+        """Copy positions, availability, earnings and ratings into the inactive buffer and flip to it."""
+        if len(taxis) > self.capacity:
+            raise ValueError(f"Fleet of {len(taxis)} exceeds snapshot capacity {self.capacity}")
+        columns = {
+            "taxi_id": array("q", [taxi.taxi_id for taxi in taxis]),
+            "zone": array("i", [self._zone_code(taxi.location) for taxi in taxis]),
+            "available": array("b", [1 if taxi.available else 0 for taxi in taxis]),
+            "total_earnings": array("d", [taxi.total_earnings for taxi in taxis]),
+            "rating": array("d", [taxi.rating for taxi in taxis]),
+        }
+        buffer = 1 - self.active
+        buf = self.memory.buf
+        header_offset = _buffer_offset(self.capacity, buffer)
+        sequence, _ = BUFFER_HEADER.unpack_from(buf, header_offset)
+        BUFFER_HEADER.pack_into(buf, header_offset, sequence + 1, 0)  # Odd: being written
+        for name, offset in _column_offsets(self.capacity, buffer).items():
+            data = columns[name].tobytes()
+            buf[offset:offset + len(data)] = data
+        BUFFER_HEADER.pack_into(buf, header_offset, sequence + 2, len(taxis))
+        self.active = buffer
+        self.version += 1
+        self._write_header()
+        return self.version
+
+    def close(self):
+        self.memory.close()
+        self.memory.unlink()
+
+class FleetSnapshotReader:
+    """Attaches to a published fleet snapshot from another process.
+
+    `read(query)` calls query(columns, zones) with memoryviews straight over
+    the shared segment, retrying if the publisher overwrote the buffer during
+    the query, so readers never copy or unpickle fleet data.
+    """
+
+    def __init__(self, name: str):
+        # Readers must not unlink the segment when they exit; only the publisher owns it
+        if sys.version_info >= (3, 13):
+            self.memory = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+            if multiprocessing.parent_process() is None:
+                # A standalone process has its own resource tracker, which would unlink the
+                # segment at exit. Children of a multiprocessing parent share the parent's
+                # tracker, where unregistering would drop the publisher's own registration.
+                resource_tracker.unregister(self.memory._name, "shared_memory")
+        magic, self.capacity, _, _, _, _ = HEADER.unpack_from(self.memory.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{name} is not a fleet snapshot segment")
+
+    def zones(self):
+        _, _, zone_count, _, _, _ = HEADER.unpack_from(self.memory.buf, 0)
+        names = []
+        for code in range(zone_count):
+            offset = _zone_table_offset() + code * ZONE_NAME_SIZE
+            names.append(bytes(self.memory.buf[offset:offset + ZONE_NAME_SIZE]).rstrip(b"\0").decode("utf-8"))
+        return names
+
+    def read(self, query):
+        buf = self.memory.buf
+        for _ in range(MAX_READ_ATTEMPTS):
+            _, _, _, active, _, version = HEADER.unpack_from(buf, 0)
+            header_offset = _buffer_offset(self.capacity, active)
+            sequence, count = BUFFER_HEADER.unpack_from(buf, header_offset)
+            if sequence % 2:
+                continue
+            offsets = _column_offsets(self.capacity, active)
+            views = {name: buf[offsets[name]:offsets[name] + count * array(code).itemsize].cast(code)
+                     for name, code in COLUMNS}
+            try:
+                result = query(views, self.zones())
+            finally:
+                for view in views.values():
+                    view.release()
+            if BUFFER_HEADER.unpack_from(buf, header_offset)[0] == sequence:
+                return result
+        raise RuntimeError("Fleet snapshot kept changing during read")
+
+    def version(self):
+        return HEADER.unpack_from(self.memory.buf, 0)[5]
+
+    def available_by_zone(self):
+        """Count available taxis per zone."""
+        def query(columns, zones):
+            counts = [0] * len(zones)
+            for zone, available in zip(columns["zone"], columns["available"]):
+                counts[zone] += available
+            return dict(zip(zones, counts))
+        return self.read(query)
+
+    def close(self):
+        self.memory.close()
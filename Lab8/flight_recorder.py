@@ -0,0 +1,226 @@
+import io
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+# Define constants for the flight recorder
+CAPACITY = 4096  # Most recent dispatches kept in the ring buffer
+SLOW_THRESHOLD = 0.05  # Seconds; slower dispatches trigger a dump
+MIN_DUMP_INTERVAL = 10.0  # Seconds between automatic dumps, so a latency storm writes one file
+SAMPLE_INTERVAL = 0.001  # Seconds between stack samples
+DUMP_DIR = "flight_recordings"
+
+class DispatchRecord:
+    """Stage timings and attributes of a single dispatch."""
+
+    __slots__ = ("trip_id", "zone", "started_at", "last_mark", "stages", "attributes", "total", "profiling")
+
+    def __init__(self, trip_id, zone: str):
+        self.trip_id = trip_id
+        self.zone = zone
+        self.started_at = time.time()
+        self.last_mark = time.perf_counter()
+        self.stages = []
+        self.attributes = {}
+        self.total = 0.0
+        self.profiling = None  # (profiling session, enabled cProfile or None) while profiled
+
+    def mark(self, stage: str):
+        """Record the time since the previous mark (or the start) under `stage`."""
+        now = time.perf_counter()
+        self.stages.append((stage, now - self.last_mark))
+        self.last_mark = now
+
+    def as_dict(self):
+        return {
+            "trip_id": self.trip_id,
+            "zone": self.zone,
+            "started_at": self.started_at,
+            "total_ms": self.total * 1000,
+            "stages_ms": {stage: elapsed * 1000 for stage, elapsed in self.stages},
+            **self.attributes,
+        }
+
+class _StackSampler:
+    """Samples one thread's stack on a background thread and counts the frames seen.
+
+    Sampling only runs while resumed, so time between dispatches is not counted.
+    """
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self.running = True
+        self.sampling = threading.Event()
+        self.sampling.set()
+        self.thread = threading.Thread(target=self._run, name="flight-recorder-sampler", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            self.sampling.wait()
+            if not self.running:
+                return
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+    def pause(self):
+        self.sampling.clear()
+
+    def resume(self):
+        self.sampling.set()
+
+    def stop(self):
+        self.running = False
+        self.sampling.set()
+        self.thread.join()
+
+class FlightRecorder:
+    """Always-on ring buffer of recent dispatch timings with on-demand profiling.
+
+    Every dispatch is recorded; when one takes longer than `threshold` the
+    whole buffer is dumped, so the requests leading up to a latency spike are
+    available. Dumps and profile reports are serialized and written to
+    `dump_dir` by a background thread, keeping the slow dispatch that
+    triggered them from getting slower. `profile_next(n)` turns on cProfile
+    or stack sampling for the next n dispatches at runtime.
+    """
+
+    def __init__(self, capacity: int = CAPACITY, threshold: float = SLOW_THRESHOLD, dump_dir: str = DUMP_DIR):
+        self.records = deque(maxlen=capacity)
+        self.threshold = threshold
+        self.dump_dir = dump_dir
+        self.last_dump = float("-inf")
+        self.dumps = 0
+        self.profile_mode = None
+        self.profile_remaining = 0
+        self.profile_session = 0
+        self.profiler = None
+        self.sampler = None
+        self.lock = threading.Lock()
+        self.writes = queue.Queue()
+        self.writer = None
+
+    def begin(self, trip_id, zone: str):
+        record = DispatchRecord(trip_id, zone)
+        with self.lock:
+            if self.profile_remaining:
+                profiler = None
+                if self.profile_mode == "cprofile":
+                    profiler = self.profiler
+                elif self.sampler is None:
+                    self.sampler = _StackSampler(threading.get_ident())
+                else:
+                    self.sampler.resume()
+                record.profiling = (self.profile_session, profiler)
+        if record.profiling and record.profiling[1] is not None:
+            record.profiling[1].enable()
+        return record
+
+    def finish(self, record: DispatchRecord, **attributes):
+        record.total = sum(elapsed for _, elapsed in record.stages)
+        record.attributes = attributes
+        if record.profiling and record.profiling[1] is not None:
+            # Disable on the dispatching thread, even if profile_next has since replaced it
+            record.profiling[1].disable()
+        with self.lock:
+            if self.sampler is not None:
+                self.sampler.pause()
+            if record.profiling and record.profiling[0] == self.profile_session and self.profile_remaining:
+                self._profiled_one()
+            self.records.append(record)
+            slow = record.total >= self.threshold
+        if slow:
+            now = time.monotonic()
+            if now - self.last_dump >= MIN_DUMP_INTERVAL:
+                self.last_dump = now
+                self.dump(reason=f"trip {record.trip_id} took {record.total * 1000:.1f} ms")
+
+    def profile_next(self, count: int, mode: str = "cprofile"):
+        """Profile the next `count` dispatches with 'cprofile' or 'sample' (stack sampling)."""
+        if mode not in ("cprofile", "sample"):
+            raise ValueError(f"Unknown profile mode: {mode}")
+        profiler = None
+        if mode == "cprofile":
+            import cProfile
+            profiler = cProfile.Profile()
+        with self.lock:
+            # A session still in progress is abandoned, and its sampler thread stopped
+            if self.sampler is not None:
+                self.sampler.stop()
+                self.sampler = None
+            self.profile_session += 1
+            self.profile_mode = mode
+            self.profile_remaining = count
+            self.profiler = profiler
+
+    def _profiled_one(self):
+        """Count one profiled dispatch; called with the lock held."""
+        self.profile_remaining -= 1
+        if self.profile_remaining:
+            return
+        if self.profile_mode == "cprofile":
+            profiler, self.profiler = self.profiler, None
+            self._write("profile", lambda: self._format_profile(profiler))
+        elif self.sampler is not None:
+            sampler, self.sampler = self.sampler, None
+            sampler.stop()
+            self._write("profile", lambda: "\n".join(f"{count} {stack}"
+                                                     for stack, count in sampler.counts.most_common(50)))
+        self.profile_mode = None
+
+    @staticmethod
+    def _format_profile(profiler):
+        import pstats
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(30)
+        return output.getvalue()
+
+    def dump(self, reason: str = "manual"):
+        """Write every buffered dispatch, oldest first, as JSON lines; returns the file path.
+
+        Only the buffer is copied here; serialization happens on the writer thread.
+        Call `flush` to wait until the file is complete.
+        """
+        header = {"reason": reason, "dumped_at": time.time()}
+        with self.lock:
+            records = list(self.records)
+        self.dumps += 1
+        return self._write("flight", lambda: "\n".join(
+            [json.dumps(header)] + [json.dumps(record.as_dict(), default=str) for record in records]))
+
+    def flush(self):
+        """Block until every queued dump and profile report has been written."""
+        self.writes.join()
+
+    def _write(self, kind: str, render):
+        path = os.path.join(self.dump_dir, f"{kind}-{time.time_ns()}.txt")
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._write_loop, name="flight-recorder-writer", daemon=True)
+            self.writer.start()
+        self.writes.put((path, render))
+        return path
+
+    def _write_loop(self):
+        while True:
+            path, render = self.writes.get()
+            try:
+                os.makedirs(self.dump_dir, exist_ok=True)
+                with open(path, "w", encoding="utf-8") as handle:
+                    handle.write(render() + "\n")
+            except OSError as e:
+                print(f"Flight recorder could not write {path}: {e}")
+            finally:
+                self.writes.task_done()
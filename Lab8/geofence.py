@@ -0,0 +1,205 @@
+import json
+import math
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:  # Batch lookups fall back to testing points one at a time
+    np = None
+
+# Define constants for the geofence grid
+CELL_SIZE = 0.01  # Grid cell size in degrees (roughly 1 km)
+MAX_CACHED_CELLS = 1 << 16  # Classified cells kept; least recently used cells are dropped beyond this
+VECTOR_MIN_POINTS = 64  # Smaller batches are cheaper to test in pure Python than to convert to arrays
+SERVICE_AREA = "service_area"
+NO_PICKUP = "no_pickup"
+
+# Cell classification against a single polygon
+OUTSIDE, INSIDE, BOUNDARY = 0, 1, 2
+
+class Polygon:
+    """A named city polygon (service area, airport, no-pickup or surge zone)."""
+
+    def __init__(self, name: str, kind: str, vertices: list):
+        if len(vertices) < 3:
+            raise ValueError(f"Polygon {name} needs at least 3 vertices")
+        if vertices[0] == vertices[-1]:
+            vertices = vertices[:-1]
+        self.name = name
+        self.kind = kind
+        self.vertices = [(float(x), float(y)) for x, y in vertices]
+        # Edges as (x1, y1, x2, y2) so ray casting does no tuple indexing per vertex
+        self.edges = [(x1, y1, x2, y2) for (x1, y1), (x2, y2)
+                      in zip(self.vertices, self.vertices[1:] + self.vertices[:1])]
+        xs = [x for x, _ in self.vertices]
+        ys = [y for _, y in self.vertices]
+        self.bounds = (min(xs), min(ys), max(xs), max(ys))
+
+    def contains(self, x: float, y: float):
+        """Even-odd ray casting point-in-polygon test."""
+        inside = False
+        for x1, y1, x2, y2 in self.edges:
+            if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+        return inside
+
+    def contains_points(self, xs, ys):
+        """Vectorized `contains` over NumPy coordinate arrays; returns a boolean array."""
+        inside = np.zeros(len(xs), dtype=bool)
+        for x1, y1, x2, y2 in self.edges:
+            if y1 == y2:
+                continue  # A horizontal edge never crosses the ray
+            crosses = (ys < y1) != (ys < y2)
+            inside ^= crosses & (xs < x1 + (ys - y1) * ((x2 - x1) / (y2 - y1)))
+        return inside
+
+    def crosses_box(self, min_x: float, min_y: float, max_x: float, max_y: float):
+        """True if any polygon edge passes through the box (Liang-Barsky clipping)."""
+        for x1, y1, x2, y2 in self.edges:
+            dx, dy = x2 - x1, y2 - y1
+            low, high = 0.0, 1.0
+            for p, q in ((-dx, x1 - min_x), (dx, max_x - x1), (-dy, y1 - min_y), (dy, max_y - y1)):
+                if p == 0:
+                    if q < 0:
+                        break
+                    continue
+                t = q / p
+                if p < 0:
+                    low = max(low, t)
+                else:
+                    high = min(high, t)
+                if low > high:
+                    break
+            else:
+                return True
+        return False
+
+class GeofenceIndex:
+    """Uniform-grid spatial index over city polygons.
+
+    Each polygon is registered in every grid cell its bounding box touches.
+    The first lookup in a cell classifies it against those polygons: a cell
+    entirely inside or outside a polygon answers every later point in it
+    without a point-in-polygon test; only boundary cells test exactly. At most
+    `max_cached_cells` classifications are kept, least recently used first out.
+    """
+
+    def __init__(self, cell_size: float = CELL_SIZE, max_cached_cells: int = MAX_CACHED_CELLS):
+        self.cell_size = cell_size
+        self.max_cached_cells = max_cached_cells
+        self.polygons = []
+        self.grid = {}  # (col, row) -> list of polygon indexes whose bounding box overlaps
+        self.cell_cache = OrderedDict()  # (col, row) -> (polygons always inside, polygons to test exactly)
+
+    @staticmethod
+    def from_geojson(path: str, cell_size: float = CELL_SIZE):
+        """Load polygons from a GeoJSON FeatureCollection with `name` and `kind` properties."""
+        with open(path, "r", encoding="utf-8") as handle:
+            collection = json.load(handle)
+        index = GeofenceIndex(cell_size)
+        for feature in collection["features"]:
+            geometry, properties = feature["geometry"], feature.get("properties", {})
+            rings = [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+            for rings_of_polygon in rings:
+                # Only the outer ring is used; holes are modelled as separate zones
+                index.add(Polygon(properties.get("name", "unnamed"),
+                                  properties.get("kind", SERVICE_AREA), rings_of_polygon[0]))
+        return index
+
+    def cell_of(self, x: float, y: float):
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def add(self, polygon: Polygon):
+        position = len(self.polygons)
+        self.polygons.append(polygon)
+        min_col, min_row = self.cell_of(polygon.bounds[0], polygon.bounds[1])
+        max_col, max_row = self.cell_of(polygon.bounds[2], polygon.bounds[3])
+        for col in range(min_col, max_col + 1):
+            for row in range(min_row, max_row + 1):
+                self.grid.setdefault((col, row), []).append(position)
+                self.cell_cache.pop((col, row), None)
+
+    def _classify(self, cell):
+        cached = self.cell_cache.get(cell)
+        if cached is not None:
+            self.cell_cache.move_to_end(cell)
+            return cached
+        col, row = cell
+        min_x, min_y = col * self.cell_size, row * self.cell_size
+        max_x, max_y = min_x + self.cell_size, min_y + self.cell_size
+        center_x, center_y = (min_x + max_x) / 2, (min_y + max_y) / 2
+        inside, boundary = [], []
+        for position in self.grid.get(cell, ()):
+            polygon = self.polygons[position]
+            if polygon.crosses_box(min_x, min_y, max_x, max_y):
+                boundary.append(polygon)
+            elif polygon.contains(center_x, center_y):
+                inside.append(polygon)
+        cached = self.cell_cache[cell] = (tuple(inside), tuple(boundary))
+        if len(self.cell_cache) > self.max_cached_cells:
+            self.cell_cache.popitem(last=False)
+        return cached
+
+    def zones_at(self, x: float, y: float):
+        """Return every polygon containing the point."""
+        inside, boundary = self._classify(self.cell_of(x, y))
+        return list(inside) + [polygon for polygon in boundary if polygon.contains(x, y)]
+
+    def zones_for_points(self, points: list):
+        """Batch variant of zones_at: points are grouped by cell so each cell is classified once."""
+        if np is not None and len(points) >= VECTOR_MIN_POINTS:
+            return self._zones_for_points_numpy(points)
+        results = [None] * len(points)
+        by_cell = {}
+        for position, (x, y) in enumerate(points):
+            by_cell.setdefault(self.cell_of(x, y), []).append(position)
+        for cell, positions in by_cell.items():
+            inside, boundary = self._classify(cell)
+            if not boundary:
+                zones = list(inside)
+                for position in positions:
+                    results[position] = zones
+                continue
+            for position in positions:
+                x, y = points[position]
+                results[position] = list(inside) + [polygon for polygon in boundary if polygon.contains(x, y)]
+        return results
+
+    def _zones_for_points_numpy(self, points: list):
+        """Group points by cell with NumPy, then test each boundary polygon against all its points at once."""
+        coordinates = np.asarray(points, dtype=float).reshape(-1, 2)
+        xs, ys = coordinates[:, 0], coordinates[:, 1]
+        cells = np.floor(coordinates / self.cell_size).astype(np.int64)
+        # One int64 key per cell, so grouping is a 1-D sort rather than a row-wise one
+        keys = (cells[:, 0] << 32) | (cells[:, 1] & 0xFFFFFFFF)
+        _, first, cell_of_point = np.unique(keys, return_index=True, return_inverse=True)
+        cell_of_point = cell_of_point.reshape(-1)
+        classified = [self._classify(cell) for cell in map(tuple, cells[first].tolist())]
+        # Points sorted by cell: the points of cell i are by_cell[offsets[i]:offsets[i + 1]]
+        by_cell = np.argsort(cell_of_point, kind="stable")
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(cell_of_point, minlength=len(first)))))
+        # Cells each boundary polygon must be tested in, keyed by polygon in first-seen order
+        pending = {}
+        for cell_index, (_, boundary) in enumerate(classified):
+            for polygon in boundary:
+                pending.setdefault(id(polygon), (polygon, []))[1].append(cell_index)
+        extra = {}  # Point position -> boundary polygons containing it
+        for polygon, cell_indexes in pending.values():
+            candidates = np.concatenate([by_cell[offsets[i]:offsets[i + 1]] for i in cell_indexes])
+            for position in candidates[polygon.contains_points(xs[candidates], ys[candidates])].tolist():
+                extra.setdefault(position, []).append(polygon)
+        # As in the pure Python path, points of one cell share its list unless a boundary test added to it
+        shared = [list(inside) for inside, _ in classified]
+        results = [shared[cell_index] for cell_index in cell_of_point.tolist()]
+        for position, polygons in extra.items():
+            results[position] = results[position] + polygons
+        return results
+
+    @staticmethod
+    def is_serviceable(zones: list):
+        """A pickup point is valid inside a service area and outside every no-pickup zone."""
+        kinds = {polygon.kind for polygon in zones}
+        return SERVICE_AREA in kinds and NO_PICKUP not in kinds
+
+    def validate_points(self, points: list):
+        return [self.is_serviceable(zones) for zones in self.zones_for_points(points)]
@@ -0,0 +1,145 @@
+import bisect
+import time
+from collections import defaultdict
+
+# Define constants for leaderboard windows
+WINDOW_SECONDS = 3600  # Windowed earnings and rating leaderboards are bucketed per hour
+WINDOWS_KEPT = 24  # Older windows are dropped; trips and ratings that arrive for them are ignored
+ALL_ZONES = "*"
+
+class RankedSet:
+    """Sorted (score, member) list with binary-search updates and O(k) top/bottom-k reads.
+
+    Members are kept in a list sorted by score, with a dict of each member's
+    current score so an update can find and move its entry. Reads of the
+    first or last k entries are plain slices.
+    """
+
+    def __init__(self):
+        self.entries = []  # Sorted list of (score, member id)
+        self.scores = {}  # member id -> current score
+
+    def update(self, member_id, score: float):
+        previous = self.scores.get(member_id)
+        if previous is not None:
+            if previous == score:
+                return
+            del self.entries[bisect.bisect_left(self.entries, (previous, member_id))]
+        self.scores[member_id] = score
+        bisect.insort(self.entries, (score, member_id))
+
+    def remove(self, member_id):
+        previous = self.scores.pop(member_id, None)
+        if previous is not None:
+            del self.entries[bisect.bisect_left(self.entries, (previous, member_id))]
+
+    def top(self, k: int):
+        return [(member_id, score) for score, member_id in reversed(self.entries[-k:])] if k > 0 else []
+
+    def bottom(self, k: int):
+        return [(member_id, score) for score, member_id in self.entries[:k]]
+
+    def __len__(self):
+        return len(self.entries)
+
+class DriverLeaderboards:
+    """Incrementally maintained earnings and rating rankings per zone and per time window.
+
+    `record_trip` is called from Taxi.complete_trip and `record_rating` from
+    Taxi.receive_feedback, so queries such as "top earners in North this hour"
+    or "lowest-rated drivers" read k entries instead of sorting the fleet.
+    Ratings are ranked both by each driver's all-time average and, with
+    `windowed=True`, by the average of the feedback received in one window.
+    Every ranking is also kept under the ALL_ZONES key for fleet-wide views.
+    """
+
+    def __init__(self, window_seconds: int = WINDOW_SECONDS, windows_kept: int = WINDOWS_KEPT):
+        self.window_seconds = window_seconds
+        self.windows_kept = windows_kept
+        self.earnings = defaultdict(RankedSet)  # (zone, window) -> taxi_id ranked by earnings
+        self.window_earnings = defaultdict(float)  # (zone, window, taxi_id) -> earnings
+        self.ratings = defaultdict(RankedSet)  # zone -> taxi_id ranked by average rating
+        self.rating_zone = {}  # taxi_id -> zone its rating is currently ranked under
+        self.window_ratings = defaultdict(RankedSet)  # (zone, window) -> taxi_id ranked by average rating in it
+        self.window_feedback = {}  # (zone, window, taxi_id) -> [feedback sum, feedback count]
+        self.windows = []  # Windows with data, oldest first
+
+    def window_of(self, timestamp: float = None):
+        return int((time.time() if timestamp is None else timestamp) // self.window_seconds)
+
+    def _track_window(self, window: int):
+        """Register a window, dropping the oldest beyond `windows_kept`; False if it is already too old.
+
+        Late windows are inserted in order rather than assumed to be the newest,
+        so their rankings expire with them.
+        """
+        position = bisect.bisect_left(self.windows, window)
+        if position < len(self.windows) and self.windows[position] == window:
+            return True
+        if position == 0 and len(self.windows) >= self.windows_kept:
+            return False
+        self.windows.insert(position, window)
+        while len(self.windows) > self.windows_kept:
+            self._drop_window(self.windows.pop(0))
+        return True
+
+    def _drop_window(self, window: int):
+        for key in [key for key in self.earnings if key[1] == window]:
+            for taxi_id in self.earnings.pop(key).scores:
+                self.window_earnings.pop((key[0], window, taxi_id), None)
+        for key in [key for key in self.window_ratings if key[1] == window]:
+            for taxi_id in self.window_ratings.pop(key).scores:
+                self.window_feedback.pop((key[0], window, taxi_id), None)
+
+    def record_trip(self, taxi_id: int, zone: str, fare: float, timestamp: float = None):
+        window = self.window_of(timestamp)
+        if not self._track_window(window):
+            return
+        for key_zone in (zone, ALL_ZONES):
+            total_key = (key_zone, window, taxi_id)
+            self.window_earnings[total_key] += fare
+            self.earnings[key_zone, window].update(taxi_id, self.window_earnings[total_key])
+
+    def record_rating(self, taxi_id: int, zone: str, rating: float, feedback: int = None, timestamp: float = None):
+        """Rank the driver's average `rating`; a new `feedback` score also counts towards its window."""
+        previous_zone = self.rating_zone.get(taxi_id)
+        if previous_zone is not None and previous_zone != zone:
+            self.ratings[previous_zone].remove(taxi_id)
+        self.rating_zone[taxi_id] = zone
+        self.ratings[zone].update(taxi_id, rating)
+        self.ratings[ALL_ZONES].update(taxi_id, rating)
+        if feedback is None:
+            return
+        window = self.window_of(timestamp)
+        if not self._track_window(window):
+            return
+        for key_zone in (zone, ALL_ZONES):
+            totals = self.window_feedback.setdefault((key_zone, window, taxi_id), [0.0, 0])
+            totals[0] += feedback
+            totals[1] += 1
+            self.window_ratings[key_zone, window].update(taxi_id, totals[0] / totals[1])
+
+    def seed_ratings(self, taxis):
+        """Rank every taxi that already has feedback, e.g. a fleet restored from a snapshot."""
+        for taxi in taxis:
+            if taxi.feedback_received > 0:
+                self.record_rating(taxi.taxi_id, taxi.location, taxi.rating)
+
+    def top_earners(self, k: int, zone: str = ALL_ZONES, timestamp: float = None):
+        ranking = self.earnings.get((zone, self.window_of(timestamp)))
+        return ranking.top(k) if ranking else []
+
+    def _rating_ranking(self, zone: str, windowed: bool, timestamp: float):
+        if windowed:
+            return self.window_ratings.get((zone, self.window_of(timestamp)))
+        return self.ratings.get(zone)
+
+    def top_rated(self, k: int, zone: str = ALL_ZONES, windowed: bool = False, timestamp: float = None):
+        """The k highest average ratings, all-time or (windowed) from feedback in the window of `timestamp`."""
+        ranking = self._rating_ranking(zone, windowed, timestamp)
+        return ranking.top(k) if ranking else []
+
+    def lowest_rated(self, k: int, zone: str = ALL_ZONES, windowed: bool = False, timestamp: float = None):
+        """Drivers for quality alerts: the k lowest average ratings, all-time or windowed."""
+        ranking = self._rating_ranking(zone, windowed, timestamp)
+        return ranking.bottom(k) if ranking else []
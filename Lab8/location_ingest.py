@@ -0,0 +1,68 @@
+import threading
+
+class LocationIngestor:
+    """Coalesces high-frequency position pings and applies them to the fleet once per tick.
+
+    Pings are (vehicle_id, timestamp, location) tuples and may arrive in any
+    order from many threads. Between ticks only the newest ping per vehicle is
+    kept; pings older than what was already applied are dropped. `apply`
+    writes the surviving positions straight onto the vehicles, without the
+    per-call print/log of update_location, and hands the vehicles that changed
+    zone to any registered listeners (e.g. a dispatch index) in one batch.
+    """
+
+    def __init__(self, vehicles: dict = None):
+        self.vehicles = vehicles if vehicles is not None else {}  # vehicle id -> Taxi or Driver
+        self.listeners = []
+        self.pending = {}  # vehicle id -> (timestamp, location)
+        self.applied_at = {}  # vehicle id -> timestamp of the last applied ping
+        self.received = 0
+        self.coalesced = 0
+        self.stale = 0
+        self.unknown = 0
+        self.lock = threading.Lock()
+
+    def add_vehicle(self, vehicle_id, vehicle):
+        self.vehicles[vehicle_id] = vehicle
+
+    def add_listener(self, listener):
+        """Register a callable taking a list of (vehicle, old_location, new_location) moves."""
+        self.listeners.append(listener)
+
+    def submit(self, pings):
+        """Accept a batch of (vehicle_id, timestamp, location) pings."""
+        with self.lock:
+            pending, applied_at = self.pending, self.applied_at
+            for vehicle_id, timestamp, location in pings:
+                self.received += 1
+                if timestamp <= applied_at.get(vehicle_id, float("-inf")):
+                    self.stale += 1
+                    continue
+                current = pending.get(vehicle_id)
+                if current is not None:
+                    self.coalesced += 1
+                    if timestamp <= current[0]:
+                        continue
+                pending[vehicle_id] = (timestamp, location)
+
+    def apply(self):
+        """Apply the newest ping per vehicle; returns the number of vehicles that changed zone."""
+        with self.lock:
+            batch, self.pending = self.pending, {}
+            for vehicle_id, (timestamp, _) in batch.items():
+                self.applied_at[vehicle_id] = timestamp
+        moves = []
+        vehicles = self.vehicles
+        for vehicle_id, (_, location) in batch.items():
+            vehicle = vehicles.get(vehicle_id)
+            if vehicle is None:
+                self.unknown += 1
+                continue
+            previous = vehicle.location
+            if previous != location:
+                vehicle.location = location
+                moves.append((vehicle, previous, location))
+        if moves:
+            for listener in self.listeners:
+                listener(moves)
+        return len(moves)
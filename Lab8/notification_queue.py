@@ -0,0 +1,156 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from Logging_Module import Logger
+
+# Define constants for outbound notification batching
+BATCH_SIZE = 500  # Max notifications handed to the transport per call
+FLUSH_INTERVAL = 0.02  # Seconds between deliveries; updates within it coalesce
+LAG_HISTORY = 10000  # Number of recent delivery lags kept for metrics
+MAX_ATTEMPTS = 3  # Deliveries tried before a failing notification is dropped
+RETRY_DELAY = 0.1  # Seconds before the first retry of a failed delivery; doubles with each attempt
+
+class Notification:
+    __slots__ = ("user", "message", "key", "queued_at", "coalesced", "attempts", "retry_at")
+
+    def __init__(self, user, message: str, key):
+        self.user = user
+        self.message = message
+        self.key = key
+        self.queued_at = time.monotonic()
+        self.coalesced = 0
+        self.attempts = 0
+        self.retry_at = 0.0
+
+class LocalTransport:
+    """Fake push transport that records deliveries and logs them in one line per batch.
+
+    A real transport implements the same `deliver_batch(notifications)` method and
+    addresses each one through `notification.user`; raising retries the batch.
+    """
+
+    def __init__(self):
+        self.delivered = deque(maxlen=LAG_HISTORY)
+
+    def deliver_batch(self, notifications: list):
+        self.delivered.extend(notifications)
+        Logger.log_debug(f"Delivered {len(notifications)} notifications.")
+
+class NotificationQueue:
+    """Outbound notification queue with per-user coalescing and batched delivery.
+
+    Messages sent with a topic (such as NotificationService.TRIP_STATUS) coalesce per user and
+    topic: a rider who gets "dispatched", "arriving" and "arrived" inside one
+    flush interval receives just "arrived". Messages without a topic are
+    always delivered. Users are keyed by `user_id`, since names repeat, and
+    the transport gets the user object to address. A batch the transport
+    rejects is retried up to MAX_ATTEMPTS times, waiting RETRY_DELAY before
+    the first retry and twice as long before each later one, so an outage
+    is not hammered; a newer update for the same key replaces a notification
+    waiting to retry. `send` never blocks on the transport.
+    """
+
+    def __init__(self, transport=None, batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        self.transport = transport or LocalTransport()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.pending = OrderedDict()  # (user_id, topic or sequence number) -> latest Notification
+        self.backoff = {}  # Key -> failed Notification waiting for its retry_at
+        self.sequence = itertools.count()
+        self.lags = deque(maxlen=LAG_HISTORY)
+        self.sent = 0
+        self.coalesced = 0
+        self.failed = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name="notification-queue", daemon=True)
+        self._worker.start()
+
+    def send(self, user, message: str, topic: str = None):
+        """Queue a message for `user`; a newer message with the same topic replaces a pending one."""
+        key = (user.user_id, topic if topic is not None else next(self.sequence))
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Notification queue is closed")
+            notification = Notification(user, message, key)
+            previous = self.pending.pop(key, None) or self.backoff.pop(key, None)
+            if previous is not None:
+                # Keep the original queue time so lag reflects how long the user has been waiting
+                notification.queued_at = previous.queued_at
+                notification.coalesced = previous.coalesced + 1
+                self.coalesced += 1
+            self.pending[key] = notification
+            if len(self.pending) == 1:
+                self._condition.notify()
+
+    def close(self, timeout: float = None):
+        """Deliver everything still pending and stop the worker."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._worker.join(timeout)
+
+    def lag_metrics(self):
+        """Return count, mean, p50, p99 and max delivery lag in seconds for recent deliveries."""
+        lags = sorted(self.lags)
+        if not lags:
+            return {"count": 0, "mean": 0.0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+        return {
+            "count": len(lags),
+            "mean": sum(lags) / len(lags),
+            "p50": lags[len(lags) // 2],
+            "p99": lags[min(len(lags) - 1, int(len(lags) * 0.99))],
+            "max": lags[-1],
+        }
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self.pending or self.backoff or self._closed)
+                if not self.pending and not self.backoff:
+                    return
+                self._release_due_retries()
+                if not self.pending:
+                    # Only backed-off retries are left; a new send wakes the worker earlier
+                    self._condition.wait(min(n.retry_at for n in self.backoff.values()) - time.monotonic())
+                    continue
+            if not self._closed:
+                # Give rapid follow-up updates a chance to coalesce before delivering
+                time.sleep(self.flush_interval)
+            with self._condition:
+                batch = []
+                while self.pending and len(batch) < self.batch_size:
+                    batch.append(self.pending.popitem(last=False)[1])
+            self._deliver(batch)
+
+    def _deliver(self, batch: list):
+        try:
+            self.transport.deliver_batch(batch)
+        except Exception as e:
+            Logger.log_error(f"Failed to deliver {len(batch)} notifications: {e}")
+            self._requeue(batch)
+            return
+        now = time.monotonic()
+        self.lags.extend(now - notification.queued_at for notification in batch)
+        self.sent += len(batch)
+
+    def _requeue(self, batch: list):
+        """Hold a failed batch back for its retry delay, unless a newer update superseded it."""
+        now = time.monotonic()
+        with self._condition:
+            for notification in batch:
+                notification.attempts += 1
+                if notification.attempts >= MAX_ATTEMPTS:
+                    self.failed += 1
+                elif notification.key not in self.pending:
+                    notification.retry_at = now + RETRY_DELAY * 2 ** (notification.attempts - 1)
+                    self.backoff[notification.key] = notification
+
+    def _release_due_retries(self):
+        """Move retries whose delay has passed to the front of the queue; called with the lock held."""
+        now = time.monotonic()
+        due = [key for key, notification in self.backoff.items() if notification.retry_at <= now]
+        for key in reversed(due):
+            self.pending[key] = self.backoff.pop(key)
+            self.pending.move_to_end(key, last=False)
@@ -0,0 +1,195 @@
+import heapq
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from Logging_Module import Logger
+
+# Define constants for payment batching
+BATCH_SIZE = 200  # Max payments settled per processor call
+MAX_DELAY = 0.05  # Max seconds a payment waits for its batch to fill
+MAX_RETRIES = 5
+BASE_BACKOFF = 0.1  # Seconds; doubled on every retry
+METRICS_HISTORY = 100  # Number of recent batches kept for metrics
+KEY_WINDOW = 1_000_000  # Most recent settled or failed keys remembered for deduplication
+
+class PaymentDeclinedException(Exception):
+    """Permanent failure: the payment must not be retried."""
+
+    def __init__(self, message="Payment was declined"):
+        self.message = message
+        super().__init__(self.message)
+
+class Payment:
+    __slots__ = ("idempotency_key", "amount", "attempts", "submitted_at")
+
+    def __init__(self, idempotency_key: str, amount: float):
+        self.idempotency_key = idempotency_key
+        self.amount = amount
+        self.attempts = 0
+        self.submitted_at = time.monotonic()
+
+class LocalPaymentProcessor:
+    """Stand-in processor that settles batches locally.
+
+    A real processor exposes the same `charge_batch` method: it receives a list
+    of payments and returns a dict of idempotency key -> None on success or
+    the exception for that payment. Raising from `charge_batch` fails the
+    whole batch, which is retried.
+    """
+
+    def __init__(self, latency: float = 0.01, failure_rate: float = 0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.settled = {}
+
+    def charge_batch(self, payments: list):
+        time.sleep(self.latency)
+        results = {}
+        for payment in payments:
+            if random.random() < self.failure_rate:
+                results[payment.idempotency_key] = ConnectionError("Processor timed out")
+            else:
+                # Keyed by idempotency key, so replays of the same charge settle once
+                self.settled.setdefault(payment.idempotency_key, payment.amount)
+                results[payment.idempotency_key] = None
+        return results
+
+class BatchMetrics:
+    __slots__ = ("size", "settled", "retried", "failed", "duration", "throughput")
+
+    def __init__(self, size: int, settled: int, retried: int, failed: int, duration: float):
+        self.size = size
+        self.settled = settled
+        self.retried = retried
+        self.failed = failed
+        self.duration = duration
+        self.throughput = size / duration if duration > 0 else float("inf")
+
+class PaymentPipeline:
+    """Settles fares asynchronously in batches against a pluggable processor.
+
+    Duplicate submissions are rejected while a key is in flight and for the
+    last KEY_WINDOW finished keys; older keys rely on the processor's own
+    idempotency, which keeps memory bounded in a long-running worker.
+    """
+
+    def __init__(self, processor=None, batch_size: int = BATCH_SIZE, max_delay: float = MAX_DELAY,
+                 max_retries: int = MAX_RETRIES, base_backoff: float = BASE_BACKOFF):
+        self.processor = processor or LocalPaymentProcessor()
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.queue = deque()
+        self.retries = []  # Heap of (retry_at, sequence, payment)
+        self.in_flight = set()  # Keys queued or waiting for a retry
+        self.finished_keys = OrderedDict()  # Key -> "settled" or "failed", most recent KEY_WINDOW only
+        self.batch_metrics = deque(maxlen=METRICS_HISTORY)
+        self.total_settled = 0
+        self.total_failed = 0
+        self._retry_sequence = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name="payment-pipeline", daemon=True)
+        self._worker.start()
+
+    def submit(self, idempotency_key: str, amount: float):
+        """Queue a fare for settlement; returns False if the key was already submitted."""
+        if amount < 0:
+            Logger.log_error("Payment amount cannot be negative.")
+            raise ValueError("Invalid payment amount")
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Payment pipeline is closed")
+            if idempotency_key in self.in_flight or idempotency_key in self.finished_keys:
+                return False
+            self.in_flight.add(idempotency_key)
+            self.queue.append(Payment(idempotency_key, amount))
+            if len(self.queue) == 1 or len(self.queue) >= self.batch_size:
+                self._condition.notify()
+        return True
+
+    def status(self, idempotency_key: str):
+        """Return "pending", "settled", "failed", or None if the key is unknown or aged out."""
+        with self._condition:
+            if idempotency_key in self.in_flight:
+                return "pending"
+            return self.finished_keys.get(idempotency_key)
+
+    def pending(self):
+        with self._condition:
+            return len(self.queue) + len(self.retries)
+
+    def close(self, timeout: float = None):
+        """Stop accepting payments and wait for queued ones, including retries, to finish."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._worker.join(timeout)
+
+    def _next_batch(self):
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                while self.retries and self.retries[0][0] <= now:
+                    self.queue.append(heapq.heappop(self.retries)[2])
+                if self.queue and (len(self.queue) >= self.batch_size or self._closed
+                                   or now - self.queue[0].submitted_at >= self.max_delay):
+                    break
+                if self._closed and not self.queue and not self.retries:
+                    return None
+                deadlines = []
+                if self.queue:
+                    deadlines.append(self.queue[0].submitted_at + self.max_delay)
+                if self.retries:
+                    deadlines.append(self.retries[0][0])
+                self._condition.wait(min(deadlines) - now if deadlines else None)
+            count = min(self.batch_size, len(self.queue))
+            return [self.queue.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._settle(batch)
+
+    def _settle(self, batch: list):
+        started = time.monotonic()
+        try:
+            results = self.processor.charge_batch(batch)
+        except Exception as e:
+            Logger.log_error(f"Payment batch of {len(batch)} failed: {e}")
+            results = {payment.idempotency_key: e for payment in batch}
+        settled = retried = failed = 0
+        with self._condition:
+            for payment in batch:
+                error = results.get(payment.idempotency_key, ConnectionError("No result from processor"))
+                if error is None:
+                    self._finish(payment.idempotency_key, "settled")
+                    settled += 1
+                    continue
+                payment.attempts += 1
+                if isinstance(error, PaymentDeclinedException) or payment.attempts > self.max_retries:
+                    Logger.log_error(f"Payment {payment.idempotency_key} failed: {error}")
+                    self._finish(payment.idempotency_key, "failed")
+                    failed += 1
+                    continue
+                retry_at = time.monotonic() + self.base_backoff * (2 ** (payment.attempts - 1))
+                self._retry_sequence += 1
+                heapq.heappush(self.retries, (retry_at, self._retry_sequence, payment))
+                retried += 1
+            self.total_settled += settled
+            self.total_failed += failed
+            metrics = BatchMetrics(len(batch), settled, retried, failed, time.monotonic() - started)
+            self.batch_metrics.append(metrics)
+        Logger.log_info(f"Payment batch: {metrics.size} payments, {settled} settled, {retried} retrying, "
+                        f"{failed} failed, {metrics.throughput:.0f} payments/s")
+
+    def _finish(self, idempotency_key: str, outcome: str):
+        """Move a key from in flight to the bounded window of finished keys; called with the lock held."""
+        self.in_flight.discard(idempotency_key)
+        self.finished_keys[idempotency_key] = outcome
+        if len(self.finished_keys) > KEY_WINDOW:
+            self.finished_keys.popitem(last=False)
@@ -0,0 +1,171 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+
+# Promo store file layout:
+#   header | Bloom filter bits | open-addressing hash table | redemption counters
+# Codes themselves are never stored, only a 64-bit hash, so each entry is 32 bytes.
+MAGIC = b"TAXIPRM1"
+HEADER = struct.Struct("<8sQQQII")
+ENTRY = struct.Struct("<QQIIIHxx")  # key hash, user hash, starts_at, expires_at, max redemptions, discount (bp)
+COUNTER_SIZE = 4
+LOAD_FACTOR = 0.7
+BLOOM_BITS_PER_CODE = 10  # ~1% false positive rate with 7 hash functions
+BLOOM_HASHES = 7
+LOCK_STRIPES = 256
+
+class PromoCode:
+    """A campaign code; user_id restricts it to one rider, zeros mean no limit."""
+
+    def __init__(self, code: str, discount: float, starts_at: int = 0, expires_at: int = 0,
+                 max_redemptions: int = 0, user_id: str = None):
+        if not 0.0 < discount <= 1.0:
+            raise ValueError(f"Invalid discount for {code}: {discount}")
+        self.code = code
+        self.discount = discount
+        self.starts_at = starts_at
+        self.expires_at = expires_at
+        self.max_redemptions = max_redemptions
+        self.user_id = user_id
+
+def _hashes(value: str):
+    """Two independent 64-bit hashes; the first is never 0, which marks an empty slot."""
+    digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+    first, second = struct.unpack("<QQ", digest)
+    return first or 1, second | 1
+
+def _user_hash(user_id: str):
+    return _hashes(user_id)[0] if user_id else 0
+
+def _align(size: int):
+    return size + (-size) % 8
+
+class PromoCodeStore:
+    """Memory-mapped promo code table with a Bloom filter and atomic redemption counters.
+
+    Build the file once with `build`, then `open` it: loading only maps the
+    file, so millions of codes are available immediately. Unknown codes are
+    usually rejected by the Bloom filter without touching the table.
+    Redemption counters live in the mapped file and are updated under
+    striped locks, so concurrent fare calculations cannot over-redeem a code.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "r+b")
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        magic, self.capacity, self.count, self.bloom_bits, self.bloom_hashes, _ = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a promo code store")
+        self.bloom_offset = HEADER.size
+        self.table_offset = self.bloom_offset + _align(self.bloom_bits // 8)
+        counters_offset = self.table_offset + self.capacity * ENTRY.size
+        self.counters = memoryview(self.map)[counters_offset:counters_offset + self.capacity * COUNTER_SIZE].cast("I")
+        self.locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self.bloom_rejections = 0
+
+    @staticmethod
+    def open(path: str):
+        return PromoCodeStore(path)
+
+    @staticmethod
+    def build(path: str, codes):
+        """Write a store file from an iterable of PromoCode objects."""
+        codes = list(codes)
+        capacity = 1
+        while capacity * LOAD_FACTOR < max(len(codes), 1):
+            capacity *= 2
+        bloom_bits = max(64, _align(len(codes) * BLOOM_BITS_PER_CODE // 8) * 8)
+        bloom = bytearray(bloom_bits // 8)
+        table = bytearray(capacity * ENTRY.size)
+        mask = capacity - 1
+        for promo in codes:
+            first, second = _hashes(promo.code)
+            for i in range(BLOOM_HASHES):
+                bit = (first + i * second) % bloom_bits
+                bloom[bit >> 3] |= 1 << (bit & 7)
+            slot = first & mask
+            while True:
+                existing = struct.unpack_from("<Q", table, slot * ENTRY.size)[0]
+                if existing == 0:
+                    break
+                if existing == first:
+                    raise ValueError(f"Duplicate promo code: {promo.code}")
+                slot = (slot + 1) & mask
+            ENTRY.pack_into(table, slot * ENTRY.size, first, _user_hash(promo.user_id), promo.starts_at,
+                            promo.expires_at, promo.max_redemptions, round(promo.discount * 10000))
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as handle:
+            handle.write(HEADER.pack(MAGIC, capacity, len(codes), bloom_bits, BLOOM_HASHES, 0))
+            handle.write(bloom + b"\0" * (_align(len(bloom)) - len(bloom)))
+            handle.write(table)
+            handle.write(b"\0" * (capacity * COUNTER_SIZE))
+        os.replace(temp_path, path)
+        return len(codes)
+
+    def _might_contain(self, first: int, second: int):
+        base = self.bloom_offset
+        for i in range(self.bloom_hashes):
+            bit = (first + i * second) % self.bloom_bits
+            if not self.map[base + (bit >> 3)] & (1 << (bit & 7)):
+                return False
+        return True
+
+    def _find(self, code: str):
+        first, second = _hashes(code)
+        if not self._might_contain(first, second):
+            self.bloom_rejections += 1
+            return None, None
+        mask = self.capacity - 1
+        slot = first & mask
+        while True:
+            entry = ENTRY.unpack_from(self.map, self.table_offset + slot * ENTRY.size)
+            if entry[0] == 0:
+                return None, None
+            if entry[0] == first:
+                return slot, entry
+            slot = (slot + 1) & mask
+
+    def _usable(self, entry, user_id: str, now: float):
+        _, user_hash, starts_at, expires_at, _, _ = entry
+        if user_hash and user_hash != _user_hash(user_id):
+            return False
+        if starts_at and now < starts_at:
+            return False
+        return not (expires_at and now >= expires_at)
+
+    def lookup(self, code: str, user_id: str = None, now: float = None):
+        """Return the discount a code would give, without redeeming it."""
+        slot, entry = self._find(code)
+        if entry is None or not self._usable(entry, user_id, time.time() if now is None else now):
+            return 0.0
+        max_redemptions = entry[4]
+        if max_redemptions and self.counters[slot] >= max_redemptions:
+            return 0.0
+        return entry[5] / 10000
+
+    def redeem(self, code: str, user_id: str = None, now: float = None):
+        """Atomically redeem a code; returns its discount, or 0.0 if it cannot be used."""
+        slot, entry = self._find(code)
+        if entry is None or not self._usable(entry, user_id, time.time() if now is None else now):
+            return 0.0
+        max_redemptions = entry[4]
+        with self.locks[slot % LOCK_STRIPES]:
+            if max_redemptions and self.counters[slot] >= max_redemptions:
+                return 0.0
+            self.counters[slot] += 1
+        return entry[5] / 10000
+
+    def redemptions(self, code: str):
+        slot, _ = self._find(code)
+        return 0 if slot is None else self.counters[slot]
+
+    def close(self):
+        """Flush redemption counters to disk and unmap the file."""
+        self.map.flush()
+        self.counters.release()
+        self.map.close()
+        self.file.close()
@@ -0,0 +1,102 @@
+import math
+import time
+
+# Define constants for demand forecasting and rebalancing
+DEMAND_HALF_LIFE = 900.0  # Seconds for a past request's weight to halve
+MAX_MOVE_FRACTION = 0.3  # Share of idle taxis that may be moved in one round
+MIN_DEFICIT = 1  # Ignore zones short by less than this many taxis
+
+def unit_distance(origin: str, destination: str):
+    """Default zone distance: free within a zone, one unit between any two zones."""
+    return 0.0 if origin == destination else 1.0
+
+class DemandForecaster:
+    """Per-zone demand as exponentially decayed request counts.
+
+    Each zone keeps one (weight, timestamp) pair; recording a request decays
+    the weight to now and adds one, so the forecast favours recent demand
+    without storing trip history.
+    """
+
+    def __init__(self, half_life: float = DEMAND_HALF_LIFE):
+        self.decay = math.log(2) / half_life
+        self.zones = {}  # zone -> [weight, last update time]
+
+    def record(self, zone: str, timestamp: float = None, weight: float = 1.0):
+        now = time.time() if timestamp is None else timestamp
+        entry = self.zones.get(zone)
+        if entry is None:
+            self.zones[zone] = [weight, now]
+            return
+        entry[0] = entry[0] * math.exp(-self.decay * max(now - entry[1], 0.0)) + weight
+        entry[1] = now
+
+    def forecast(self, timestamp: float = None):
+        """Return {zone: decayed demand} as of `timestamp`."""
+        now = time.time() if timestamp is None else timestamp
+        return {zone: weight * math.exp(-self.decay * max(now - updated, 0.0))
+                for zone, (weight, updated) in self.zones.items()}
+
+class Rebalancer:
+    """Moves idle taxis from zones with surplus supply towards forecast demand.
+
+    Each round spreads the idle fleet over zones in proportion to forecast
+    demand, then matches surplus taxis to deficit zones cheapest-first: a
+    greedy solution to the transport problem that is fast enough to run
+    every few seconds. Moves are issued through Taxi.update_location.
+    """
+
+    def __init__(self, forecaster: DemandForecaster, distance=unit_distance,
+                 max_move_fraction: float = MAX_MOVE_FRACTION):
+        self.forecaster = forecaster
+        self.distance = distance
+        self.max_move_fraction = max_move_fraction
+        self.moves_issued = 0
+
+    def plan(self, taxis: list, timestamp: float = None):
+        """Return a list of (taxi, destination zone) moves without applying them."""
+        idle = {}
+        for taxi in taxis:
+            if taxi.available and taxi.current_trip is None:
+                idle.setdefault(taxi.location, []).append(taxi)
+        total_idle = sum(len(zone_taxis) for zone_taxis in idle.values())
+        demand = self.forecaster.forecast(timestamp)
+        total_demand = sum(demand.values())
+        if not total_idle or not total_demand:
+            return []
+
+        # Integer targets proportional to demand; largest remainders get the leftover taxis
+        shares = {zone: total_idle * weight / total_demand for zone, weight in demand.items()}
+        targets = {zone: int(share) for zone, share in shares.items()}
+        leftover = total_idle - sum(targets.values())
+        for zone in sorted(shares, key=lambda zone: shares[zone] - targets[zone], reverse=True)[:leftover]:
+            targets[zone] += 1
+
+        surplus = {zone: len(zone_taxis) - targets.get(zone, 0) for zone, zone_taxis in idle.items()}
+        surplus = {zone: count for zone, count in surplus.items() if count > 0}
+        deficit = {zone: target - len(idle.get(zone, ())) for zone, target in targets.items()}
+        deficit = {zone: count for zone, count in deficit.items() if count >= MIN_DEFICIT}
+        if not surplus or not deficit:
+            return []
+
+        budget = max(1, int(total_idle * self.max_move_fraction))
+        pairs = sorted((self.distance(origin, destination), origin, destination)
+                       for origin in surplus for destination in deficit)
+        moves = []
+        for _, origin, destination in pairs:
+            count = min(surplus[origin], deficit[destination], budget - len(moves))
+            for _ in range(count):
+                moves.append((idle[origin].pop(), destination))
+            surplus[origin] -= count
+            deficit[destination] -= count
+            if len(moves) >= budget:
+                break
+        return moves
+
+    def rebalance(self, taxis: list, timestamp: float = None):
+        """Plan and apply one rebalancing round; returns the number of taxis moved."""
+        moves = self.plan(taxis, timestamp)
+        for taxi, destination in moves:
+            taxi.update_location(destination)
+        self.moves_issued += len(moves)
+        return len(moves)
@@ -0,0 +1,108 @@
+import random
+from rebalancing import DemandForecaster, Rebalancer
+
+# Simulation settings
+GRID = 5  # Zones form a GRID x GRID city
+FLEET_SIZES = (150, 250, 400)  # From a scarce to an oversupplied fleet
+STEPS = 480  # One step is 30 simulated seconds, so four hours in total
+STEP_SECONDS = 30
+REQUESTS_PER_STEP = 12
+TRIP_STEPS = (4, 16)  # Trip duration range in steps
+MAX_PICKUP_DISTANCE = 1  # Zones away a taxi may be sent before the request fails
+REBALANCE_EVERY = 4  # Steps between rebalancing rounds
+SEED = 42
+
+ZONES = [f"Z{row}{col}" for row in range(GRID) for col in range(GRID)]
+
+def zone_distance(origin: str, destination: str):
+    """Manhattan distance between zone grid cells."""
+    return abs(int(origin[1]) - int(destination[1])) + abs(int(origin[2]) - int(destination[2]))
+
+class SimTaxi:
+    """Minimal stand-in for taxi_system.Taxi with the attributes the Rebalancer uses.
+
+    A rebalancing move is not free: the taxi drives empty to the new zone, one
+    step per zone of distance, and cannot take a ride until it arrives.
+    """
+
+    step = 0  # Current simulation step, shared by every taxi
+    deadhead = 0  # Zones driven empty by rebalancing moves, across the fleet
+
+    def __init__(self, taxi_id: int, location: str):
+        self.taxi_id = taxi_id
+        self.location = location
+        self.available = True
+        self.current_trip = None  # Destination zone while carrying a rider
+        self.heading = None  # Destination zone while repositioning
+        self.busy_until = 0
+
+    def update_location(self, new_location: str):
+        distance = zone_distance(self.location, new_location)
+        SimTaxi.deadhead += distance
+        self.heading = new_location
+        self.available = False
+        self.busy_until = SimTaxi.step + distance
+
+    def arrive(self):
+        self.location = self.current_trip or self.heading
+        self.current_trip = self.heading = None
+        self.available = True
+
+def demand_weights(step: int):
+    """Demand concentrates downtown early on and drifts to the north-west later."""
+    hotspot = (2, 2) if step < STEPS // 2 else (0, 0)
+    return [1.0 / (1 + zone_distance(zone, f"Z{hotspot[0]}{hotspot[1]}")) ** 2 for zone in ZONES]
+
+def simulate(rebalance: bool, fleet_size: int):
+    rng = random.Random(SEED)
+    taxis = [SimTaxi(i, rng.choice(ZONES)) for i in range(fleet_size)]
+    forecaster = DemandForecaster(half_life=600)
+    rebalancer = Rebalancer(forecaster, distance=zone_distance)
+    requests = failed = pickup_distance = 0
+    SimTaxi.deadhead = 0
+
+    for step in range(STEPS):
+        now = step * STEP_SECONDS
+        SimTaxi.step = step
+        for taxi in taxis:
+            if not taxi.available and taxi.busy_until <= step:
+                taxi.arrive()
+
+        weights = demand_weights(step)
+        for pickup in rng.choices(ZONES, weights=weights, k=REQUESTS_PER_STEP):
+            requests += 1
+            forecaster.record(pickup, now)
+            candidates = [taxi for taxi in taxis if taxi.available
+                          and zone_distance(taxi.location, pickup) <= MAX_PICKUP_DISTANCE]
+            if not candidates:
+                failed += 1
+                continue
+            taxi = min(candidates, key=lambda taxi: zone_distance(taxi.location, pickup))
+            pickup_distance += zone_distance(taxi.location, pickup)
+            # Riders leave the hotspot for anywhere in the city, draining supply where demand is
+            taxi.current_trip = rng.choice(ZONES)
+            taxi.available = False
+            taxi.busy_until = step + rng.randint(*TRIP_STEPS)
+
+        if rebalance and step % REBALANCE_EVERY == 0:
+            rebalancer.rebalance(taxis, now)
+
+    served = requests - failed
+    return {
+        "requests": requests,
+        "failed_rate": failed / requests,
+        "mean_pickup_distance": pickup_distance / served if served else 0.0,
+        "moves": rebalancer.moves_issued,
+        "deadhead": SimTaxi.deadhead,
+    }
+
+def main():
+    print(f"{'fleet':>6}  {'mode':<14}{'requests':>10}{'failed %':>10}{'pickup dist':>13}{'moves':>8}{'deadhead':>10}")
+    for fleet_size in FLEET_SIZES:
+        for label, rebalance in (("baseline", False), ("rebalancing", True)):
+            result = simulate(rebalance, fleet_size)
+            print(f"{fleet_size:>6}  {label:<14}{result['requests']:>10}{result['failed_rate'] * 100:>10.1f}"
+                  f"{result['mean_pickup_distance']:>13.2f}{result['moves']:>8}{result['deadhead']:>10}")
+
+if __name__ == "__main__":
+    main()
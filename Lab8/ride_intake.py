@@ -0,0 +1,201 @@
+import csv
+import json
+import os
+import stat
+import sys
+from collections import deque
+from itertools import islice
+from trip_management import Trip
+from Passengers import Passenger
+
+# Define constants for the intake pipeline
+BATCH_SIZE = 512  # Max requests held in memory between parsing and dispatch
+READ_BUFFER_SIZE = 64 * 1024  # 64 KB socket reads
+MAX_LINE_LENGTH = 64 * 1024  # Longer socket lines are dropped instead of buffered
+CONNECTION_TIMEOUT = 30.0  # Seconds a silent client may hold the listener before it is dropped
+RECENT_TRIPS = 1000  # Streamed trips kept for inspection; older ones are only counted
+TRIP_ID_RANGE = (-2 ** 63, 2 ** 63 - 1)  # Journal and snapshot store trip IDs as int64
+CSV_FIELDS = ["trip_id", "name", "pickup_location", "destination"]
+
+class RideRequest:
+    """A single parsed ride request from the intake stream."""
+
+    __slots__ = ("trip_id", "name", "pickup_location", "destination")
+
+    def __init__(self, trip_id: int, name: str, pickup_location: str, destination: str):
+        self.trip_id = trip_id
+        self.name = name
+        self.pickup_location = pickup_location
+        self.destination = destination
+
+def read_file_lines(path: str):
+    """Yield lines from a file, or from stdin when the path is '-'."""
+    if path == "-":
+        yield from sys.stdin
+        return
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as handle:
+        yield from handle
+
+def read_socket_lines(address, timeout: float = CONNECTION_TIMEOUT):
+    """Yield lines from a TCP (host, port) or Unix socket path, one connection at a time.
+
+    A connection that sends nothing for `timeout` seconds is dropped so it cannot
+    starve the clients queued behind it.
+    """
+    import socket
+    if isinstance(address, str):
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if os.path.exists(address):
+            # Only clear a stale socket left by a previous run, never an unrelated file
+            if not stat.S_ISSOCK(os.stat(address).st_mode):
+                raise FileExistsError(f"{address} exists and is not a socket")
+            os.unlink(address)
+    else:
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    with server:
+        server.bind(address)
+        server.listen()
+        while True:
+            connection, _ = server.accept()
+            with connection:
+                connection.settimeout(timeout)
+                try:
+                    yield from _connection_lines(connection)
+                except (ConnectionError, socket.timeout) as e:
+                    print(f"Dropping intake connection: {e}")
+
+def _connection_lines(connection):
+    """Yield decoded lines from one connection, holding at most MAX_LINE_LENGTH bytes of a partial line.
+
+    Invalid UTF-8 is replaced rather than raised, so one bad client cannot stop the intake;
+    the parser then skips the line as malformed.
+    """
+    pending = b""
+    oversized = False  # Dropping the rest of a line that exceeded MAX_LINE_LENGTH
+    while True:
+        chunk = connection.recv(READ_BUFFER_SIZE)
+        if not chunk:
+            break
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if oversized:
+                oversized = False
+                continue
+            if len(line) > MAX_LINE_LENGTH:
+                print(f"Skipping request line over {MAX_LINE_LENGTH} bytes")
+                continue
+            yield line.decode("utf-8", errors="replace")
+        if len(pending) > MAX_LINE_LENGTH:
+            if not oversized:
+                print(f"Skipping request line over {MAX_LINE_LENGTH} bytes")
+            oversized = True
+            pending = b""
+    if pending and not oversized:
+        yield pending.decode("utf-8", errors="replace")
+
+def _trip_id(value):
+    trip_id = int(value)
+    if not TRIP_ID_RANGE[0] <= trip_id <= TRIP_ID_RANGE[1]:
+        raise ValueError(f"trip_id {trip_id} is out of range")
+    return trip_id
+
+def parse_json_lines(lines):
+    """Parse newline-delimited JSON into RideRequest objects, skipping malformed lines."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            yield RideRequest(_trip_id(record["trip_id"]), record["name"],
+                              record["pickup_location"], record["destination"])
+        except (ValueError, KeyError, TypeError, OverflowError, RecursionError):
+            # RecursionError: deeply nested JSON; OverflowError: numbers like 1e400
+            print(f"Skipping malformed request: {line[:80]}")
+
+def parse_csv_lines(lines, has_header: bool = True):
+    """Parse CSV rows (trip_id,name,pickup_location,destination) into RideRequest objects."""
+    rows = csv.reader(lines)
+    if has_header:
+        next(rows, None)
+    for row in rows:
+        if len(row) != len(CSV_FIELDS):
+            print(f"Skipping malformed request: {row}")
+            continue
+        try:
+            yield RideRequest(_trip_id(row[0]), row[1], row[2], row[3])
+        except ValueError:
+            print(f"Skipping malformed request: {row}")
+
+def batched(iterable, size: int = BATCH_SIZE):
+    """Group an iterable into lists of at most `size` items."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+class RequestIntake:
+    """Streams ride requests from a source and dispatches them with flat memory.
+
+    Streamed trips are not appended to TripManager.trips/failed_trips, which
+    would grow for as long as the stream runs: the intake keeps counters and
+    the last RECENT_TRIPS trips only. Trips in progress stay reachable through
+    their taxi until they complete, and `Dispatcher.tick` runs between batches
+    so their deadlines fire during a long stream.
+    """
+
+    PARSERS = {
+        "json": parse_json_lines,
+        "csv": parse_csv_lines,
+    }
+
+    def __init__(self, dispatcher, batch_size: int = BATCH_SIZE):
+        self.dispatcher = dispatcher
+        self.batch_size = batch_size
+        self.processed = 0
+        self.failed = 0
+        self.recent_trips = deque(maxlen=RECENT_TRIPS)
+
+    def requests_from(self, lines, fmt: str = "json"):
+        if fmt not in self.PARSERS:
+            raise ValueError(f"Unsupported request format: {fmt}")
+        return self.PARSERS[fmt](lines)
+
+    def run(self, lines, fmt: str = "json"):
+        """Consume the stream in bounded batches until it is exhausted."""
+        for batch in batched(self.requests_from(lines, fmt), self.batch_size):
+            for request in batch:
+                passenger = Passenger(request.name, request.pickup_location, request.destination)
+                trip = Trip(request.trip_id, passenger, request.pickup_location, request.destination)
+                passenger.current_trip = trip
+                if self.dispatcher.dispatch_taxi(trip) is None:
+                    self.failed += 1
+                self.recent_trips.append(trip)
+            self.processed += len(batch)
+            self.dispatcher.tick()
+        return self.processed
+
+    def run_file(self, path: str, fmt: str = None):
+        """Stream requests from a file path ('-' for stdin); format defaults to the file extension."""
+        if fmt is None:
+            fmt = "csv" if path.endswith(".csv") else "json"
+        return self.run(read_file_lines(path), fmt)
+
+    def run_socket(self, address, fmt: str = "json"):
+        """Stream requests from a TCP (host, port) tuple or a Unix socket path."""
+        return self.run(read_socket_lines(address), fmt)
+
+def main():
+    from taxi_system import Dispatcher
+    dispatcher = Dispatcher()
+    intake = RequestIntake(dispatcher)
+    source = sys.argv[1] if len(sys.argv) > 1 else "-"
+    intake.run_file(source)
+    print(f"Processed {intake.processed} requests, {intake.failed} failed.")
+
+if __name__ == "__main__":
+    main()
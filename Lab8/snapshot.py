@@ -0,0 +1,355 @@
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import MutableSequence
+from taxi_system import Taxi
+from trip_management import Trip, TripManager
+from Passengers import Passenger
+from trip_journal import TripJournal
+
+# Snapshot file layout:
+#   header | string table | taxi columns | trip columns
+# Every column is a contiguous, 8-byte aligned array so it can be cast
+# straight out of the memory-mapped file without unpacking record by record.
+MAGIC = b"TAXISNP3"
+HEADER = struct.Struct("<8sBxxxIIIIIIQ4x")  # Padded to 48 bytes so the columns after it stay aligned
+FULL, DELTA = 0, 1
+ACTIVE, FAILED, CARRIED = 0, 1, 2  # CARRIED trips are only held by their taxi; their slot is the taxi's
+NO_SLOT = -1
+
+TAXI_COLUMNS = [
+    ("slot", "q"), ("taxi_id", "q"), ("location", "i"), ("available", "b"),
+    ("driver_name", "i"), ("total_earnings", "d"), ("rating", "d"),
+    ("feedback_received", "i"), ("trip_slot", "q"),
+]
+TRIP_COLUMNS = [
+    ("list", "b"), ("slot", "q"), ("trip_id", "q"), ("journal_key", "q"), ("passenger", "i"),
+    ("pickup_location", "i"), ("destination", "i"), ("price", "d"),
+    ("status", "i"), ("distance", "d"), ("taxi_slot", "q"),
+]
+
+class SnapshotError(Exception):
+    def __init__(self, message="Snapshot file is corrupt or incompatible"):
+        self.message = message
+        super().__init__(self.message)
+
+def _pad(size: int):
+    return (-size) % 8
+
+class _StringTable:
+    """Interns zone, driver and passenger names so each is stored once per file."""
+
+    def __init__(self):
+        self.index = {}
+        self.strings = []
+
+    def add(self, value: str):
+        position = self.index.get(value)
+        if position is None:
+            position = self.index[value] = len(self.strings)
+            self.strings.append(value)
+        return position
+
+    def encode(self):
+        return "\0".join(self.strings).encode("utf-8")
+
+def _taxi_state(taxi: Taxi, trip_slots: dict):
+    trip_slot = trip_slots.get(id(taxi.current_trip), NO_SLOT) if taxi.current_trip else NO_SLOT
+    return (taxi.taxi_id, taxi.location, taxi.available, taxi.driver_name,
+            taxi.total_earnings, taxi.rating, taxi.feedback_received, trip_slot)
+
+def _trip_state(trip: Trip, taxi_slots: dict):
+    taxi_slot = taxi_slots.get(id(trip.taxi), NO_SLOT) if trip.taxi else NO_SLOT
+    return (trip.trip_id, trip.journal_key, trip.passenger.name, trip.pickup_location, trip.destination,
+            trip.price, trip.status, trip.distance, taxi_slot)
+
+def _add_trip_row(trip_columns: dict, strings: _StringTable, list_id: int, slot: int, state: tuple):
+    trip_id, journal_key, passenger, pickup, destination, price, status, distance, taxi_slot = state
+    trip_columns["list"].append(list_id)
+    trip_columns["slot"].append(slot)
+    trip_columns["trip_id"].append(trip_id)
+    trip_columns["journal_key"].append(journal_key)
+    trip_columns["passenger"].append(strings.add(passenger))
+    trip_columns["pickup_location"].append(strings.add(pickup))
+    trip_columns["destination"].append(strings.add(destination))
+    trip_columns["price"].append(price)
+    trip_columns["status"].append(strings.add(status))
+    trip_columns["distance"].append(distance)
+    trip_columns["taxi_slot"].append(taxi_slot)
+
+class SnapshotWriter:
+    """Writes full snapshots and incremental deltas of a Dispatcher's state.
+
+    The writer remembers what it last wrote, so `write_delta` only emits the
+    taxis and trips that changed since the previous full snapshot or delta.
+    Trips held by a taxi but kept in neither trip list, such as those streamed
+    by RequestIntake, are written in every file; there is at most one per taxi.
+    Each write checkpoints the active TripJournal, so a restart must restore
+    the full snapshot together with every delta written after it.
+    """
+
+    def __init__(self, dispatcher):
+        self.dispatcher = dispatcher
+        self._taxis = []
+        self._trips = {ACTIVE: [], FAILED: []}
+        self._has_base = False
+
+    def write_full(self, path: str):
+        self._taxis = []
+        self._trips = {ACTIVE: [], FAILED: []}
+        written = self._write(path, FULL)
+        self._has_base = True
+        return written
+
+    def write_delta(self, path: str):
+        if not self._has_base:
+            raise SnapshotError("A full snapshot must be written before a delta")
+        return self._write(path, DELTA)
+
+    def _write(self, path: str, kind: int):
+        taxis = self.dispatcher.taxis
+        trip_lists = {
+            ACTIVE: self.dispatcher.trip_manager.trips,
+            FAILED: self.dispatcher.trip_manager.failed_trips,
+        }
+        taxi_slots = {id(taxi): slot for slot, taxi in enumerate(taxis)}
+        trip_slots = {id(trip): slot for slot, trip in enumerate(trip_lists[ACTIVE])}
+
+        strings = _StringTable()
+        taxi_columns = {name: array(code) for name, code in TAXI_COLUMNS}
+        trip_columns = {name: array(code) for name, code in TRIP_COLUMNS}
+
+        for slot, taxi in enumerate(taxis):
+            state = _taxi_state(taxi, trip_slots)
+            if slot < len(self._taxis) and self._taxis[slot] == state:
+                continue
+            if slot < len(self._taxis):
+                self._taxis[slot] = state
+            else:
+                self._taxis.append(state)
+            taxi_id, location, available, driver_name, earnings, rating, feedback, trip_slot = state
+            taxi_columns["slot"].append(slot)
+            taxi_columns["taxi_id"].append(taxi_id)
+            taxi_columns["location"].append(strings.add(location))
+            taxi_columns["available"].append(1 if available else 0)
+            taxi_columns["driver_name"].append(strings.add(driver_name))
+            taxi_columns["total_earnings"].append(earnings)
+            taxi_columns["rating"].append(rating)
+            taxi_columns["feedback_received"].append(feedback)
+            taxi_columns["trip_slot"].append(trip_slot)
+        del self._taxis[len(taxis):]
+
+        for list_id, trips in trip_lists.items():
+            previous = self._trips[list_id]
+            for slot, trip in enumerate(trips):
+                state = _trip_state(trip, taxi_slots)
+                if slot < len(previous) and previous[slot] == state:
+                    continue
+                if slot < len(previous):
+                    previous[slot] = state
+                else:
+                    previous.append(state)
+                _add_trip_row(trip_columns, strings, list_id, slot, state)
+            del previous[len(trips):]
+        for slot, taxi in enumerate(taxis):
+            if taxi.current_trip is not None and id(taxi.current_trip) not in trip_slots:
+                _add_trip_row(trip_columns, strings, CARRIED, slot, _trip_state(taxi.current_trip, taxi_slots))
+
+        blob = strings.encode()
+        header = HEADER.pack(MAGIC, kind, len(taxi_columns["slot"]), len(trip_columns["slot"]),
+                             len(taxis), len(trip_lists[ACTIVE]), len(trip_lists[FAILED]),
+                             len(strings.strings), len(blob))
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as handle:
+            handle.write(header)
+            handle.write(blob + b"\0" * _pad(len(blob)))
+            for columns, layout in ((taxi_columns, TAXI_COLUMNS), (trip_columns, TRIP_COLUMNS)):
+                for name, _ in layout:
+                    data = columns[name].tobytes()
+                    handle.write(data + b"\0" * _pad(len(data)))
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, path)
+        # Everything journaled so far is now in the snapshot chain
+        TripJournal.checkpoint_active()
+        return len(taxi_columns["slot"]), len(trip_columns["slot"])
+
+def _read_columns(view, offset: int, rows: int, layout):
+    columns = {}
+    for name, code in layout:
+        size = rows * array(code).itemsize
+        columns[name] = view[offset:offset + size].cast(code)
+        offset += size + _pad(size)
+    return columns, offset
+
+def _load_file(path: str):
+    """Map a snapshot file and return zero-copy column views over it.
+
+    The mapping stays alive for as long as any returned column is referenced,
+    which lets restored trips be materialized lazily straight from the file.
+    """
+    with open(path, "rb") as handle:
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    (magic, kind, taxi_rows, trip_rows, fleet_size, trip_count, failed_count,
+     _, blob_size) = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise SnapshotError(f"{path} is not a taxi snapshot")
+    offset = HEADER.size
+    strings = bytes(view[offset:offset + blob_size]).decode("utf-8").split("\0")
+    offset += blob_size + _pad(blob_size)
+    taxis, offset = _read_columns(view, offset, taxi_rows, TAXI_COLUMNS)
+    trips, offset = _read_columns(view, offset, trip_rows, TRIP_COLUMNS)
+    if offset > len(view):
+        raise SnapshotError(f"{path} is truncated")
+    return kind, (fleet_size, trip_count, failed_count), strings, taxis, trips
+
+def _trip_from_row(columns: dict, strings: list, row: int, fleet: list):
+    pickup = strings[columns["pickup_location"][row]]
+    destination = strings[columns["destination"][row]]
+    trip = Trip.__new__(Trip)
+    passenger = Passenger.__new__(Passenger)
+    passenger.__dict__.update(name=strings[columns["passenger"][row]], pickup_location=pickup,
+                              destination=destination, current_trip=trip, feedback_given=False)
+    taxi_slot = columns["taxi_slot"][row]
+    trip.__dict__.update(trip_id=columns["trip_id"][row], journal_key=columns["journal_key"][row],
+                         passenger=passenger,
+                         pickup_location=pickup, destination=destination,
+                         taxi=fleet[taxi_slot] if taxi_slot != NO_SLOT else None,
+                         price=columns["price"][row], status=strings[columns["status"][row]],
+                         distance=columns["distance"][row])
+    return trip
+
+class LazyTripList(MutableSequence):
+    """A trip list restored from a snapshot that builds Trip objects on first access.
+
+    Unmaterialized entries hold their row number in the mapped trip columns, so
+    restoring millions of trips costs one list allocation instead of millions
+    of objects. Appends and inserts of real Trip objects work as on a list.
+    """
+
+    def __init__(self, rows: range, columns: dict, strings: list, fleet: list):
+        self._items = list(rows)
+        self._columns = columns
+        self._strings = strings
+        self._fleet = fleet
+
+    def _materialize(self, index: int):
+        item = self._items[index]
+        if not isinstance(item, int):
+            return item
+        trip = self._items[index] = _trip_from_row(self._columns, self._strings, item, self._fleet)
+        return trip
+
+    def slots_for(self, journal_keys):
+        """Return the slots holding trips with the given journal keys without materializing other trips."""
+        journal_keys = set(journal_keys)
+        column = self._columns["journal_key"]
+        return [slot for slot, item in enumerate(self._items)
+                if (column[item] if isinstance(item, int) else getattr(item, "journal_key", None)) in journal_keys]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._materialize(i) for i in range(*index.indices(len(self._items)))]
+        if index < 0:
+            index += len(self._items)
+        return self._materialize(index)
+
+    def __setitem__(self, index, trip):
+        self._items[index] = trip
+
+    def __delitem__(self, index):
+        del self._items[index]
+
+    def __len__(self):
+        return len(self._items)
+
+    def insert(self, index: int, trip):
+        self._items.insert(index, trip)
+
+def _link_taxis(taxi_links, active):
+    for taxi, trip_slot in taxi_links:
+        taxi.current_trip = active[trip_slot]
+
+def _link_carried(fleet: list, columns: dict, strings: list, rows):
+    """Rebuild CARRIED trips among `rows` and hand each back to its taxi."""
+    for row in rows:
+        if columns["list"][row] == CARRIED:
+            fleet[columns["slot"][row]].current_trip = _trip_from_row(columns, strings, row, fleet)
+
+def _apply_taxis(fleet, fleet_size, strings, taxis):
+    new_taxi = Taxi.__new__
+    taxi_links = []
+    for slot, taxi_id, location, available, driver_name, earnings, rating, feedback, trip_slot in zip(
+            *(taxis[name] for name, _ in TAXI_COLUMNS)):
+        if slot < len(fleet):
+            taxi = fleet[slot]
+        else:
+            taxi = new_taxi(Taxi)
+            fleet.append(taxi)
+        taxi.__dict__.update(taxi_id=taxi_id, location=strings[location], available=bool(available),
+                             driver_name=strings[driver_name], current_trip=None,
+                             total_earnings=earnings, rating=rating, feedback_received=feedback)
+        if trip_slot != NO_SLOT:
+            taxi_links.append((taxi, trip_slot))
+    del fleet[fleet_size:]
+    return taxi_links
+
+def _apply_delta(dispatcher, sizes, strings, taxis, trips):
+    fleet = dispatcher.taxis
+    trip_lists = {
+        ACTIVE: dispatcher.trip_manager.trips,
+        FAILED: dispatcher.trip_manager.failed_trips,
+    }
+    fleet_size, trip_count, failed_count = sizes
+    taxi_links = _apply_taxis(fleet, fleet_size, strings, taxis)
+
+    for list_id, slot, trip_id, journal_key, name, pickup, destination, price, status, distance, taxi_slot in zip(
+            *(trips[column] for column, _ in TRIP_COLUMNS)):
+        if list_id == CARRIED:
+            continue
+        target = trip_lists[list_id]
+        pickup, destination = strings[pickup], strings[destination]
+        if slot < len(target):
+            trip = target[slot]
+            passenger = trip.passenger
+        else:
+            trip = Trip.__new__(Trip)
+            passenger = Passenger.__new__(Passenger)
+            target.append(trip)
+        passenger.__dict__.update(name=strings[name], pickup_location=pickup, destination=destination,
+                                  current_trip=trip, feedback_given=False)
+        trip.__dict__.update(trip_id=trip_id, journal_key=journal_key, passenger=passenger,
+                             pickup_location=pickup, destination=destination, price=price, status=strings[status],
+                             distance=distance, taxi=fleet[taxi_slot] if taxi_slot != NO_SLOT else None)
+    del trip_lists[ACTIVE][trip_count:]
+    del trip_lists[FAILED][failed_count:]
+    _link_taxis(taxi_links, trip_lists[ACTIVE])
+    _link_carried(fleet, trips, strings, range(len(trips["list"])))
+
+def restore(dispatcher, path: str, deltas: list = ()):
+    """Restore a Dispatcher in place from a full snapshot plus any deltas, in order.
+
+    Taxis are rebuilt eagerly; trips stay in the mapped file until first accessed.
+    """
+    kind, sizes, strings, taxis, trips = _load_file(path)
+    if kind != FULL:
+        raise SnapshotError(f"{path} is a delta, not a full snapshot")
+    fleet_size, trip_count, failed_count = sizes
+    dispatcher.taxis = []
+    taxi_links = _apply_taxis(dispatcher.taxis, fleet_size, strings, taxis)
+    # A full snapshot writes every active trip, then every failed trip, in slot order, then carried trips.
+    trip_manager = TripManager()
+    trip_manager.trips = LazyTripList(range(trip_count), trips, strings, dispatcher.taxis)
+    trip_manager.failed_trips = LazyTripList(range(trip_count, trip_count + failed_count),
+                                             trips, strings, dispatcher.taxis)
+    dispatcher.trip_manager = trip_manager
+    _link_taxis(taxi_links, trip_manager.trips)
+    _link_carried(dispatcher.taxis, trips, strings, range(trip_count + failed_count, len(trips["list"])))
+    for delta_path in deltas:
+        kind, sizes, strings, taxis, trips = _load_file(delta_path)
+        if kind != DELTA:
+            raise SnapshotError(f"{delta_path} is a full snapshot, not a delta")
+        _apply_delta(dispatcher, sizes, strings, taxis, trips)
+    return dispatcher
@@ -0,0 +1,83 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Modules whose cold-start cost is tracked; run from the Lab8 directory
+MODULES = [
+    "Logging_Module",
+    "Pricing",
+    "Error_Handling",
+    "Passengers",
+    "Feedback",
+    "taxi_system",
+    "trip_management",
+    "Additional_Functionalities",
+    "ride_intake",
+    "snapshot",
+    "trip_journal",
+    "payment_pipeline",
+    "notification_queue",
+]
+RUNS = 5
+
+# Runs in a fresh interpreter so every measurement is a cold import
+CHILD = """
+import importlib, json, os, sys, time
+before = set(sys.modules)
+started = time.perf_counter()
+error = None
+try:
+    importlib.import_module(sys.argv[1])
+except Exception as e:
+    error = f"{type(e).__name__}: {e}"
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "import_ms": elapsed * 1000,
+    "modules": len(set(sys.modules) - before),
+    "created_logs_dir": os.path.exists("logs") and not os.environ.get("HAD_LOGS_DIR"),
+    "error": error,
+}))
+"""
+
+def measure(module: str, runs: int = RUNS):
+    """Return the median import time, wall-clock process time and imported-module count.
+
+    If the import fails, the failing sample is returned straight away: a
+    partial import's timings say nothing about the module's real cost.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, HAD_LOGS_DIR="1" if os.path.exists(os.path.join(here, "logs")) else "")
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", CHILD, module], cwd=here, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        result["process_ms"] = (time.perf_counter() - started) * 1000
+        if result["error"]:
+            return result
+        samples.append(result)
+    samples.sort(key=lambda sample: sample["process_ms"])
+    return samples[len(samples) // 2]
+
+def main():
+    print(f"{'module':<28}{'import ms':>10}{'process ms':>12}{'modules':>9}  notes")
+    failed = 0
+    for module in MODULES:
+        result = measure(module)
+        if result["error"]:
+            failed += 1
+            print(f"{module:<28}{'-':>10}{'-':>12}{'-':>9}  IMPORT FAILED: {result['error']}")
+            continue
+        notes = []
+        if result["created_logs_dir"]:
+            notes.append("created logs/ at import")
+        print(f"{module:<28}{result['import_ms']:>10.1f}{result['process_ms']:>12.1f}"
+              f"{result['modules']:>9}  {'; '.join(notes)}")
+    if failed:
+        print(f"{failed} of {len(MODULES)} modules failed to import; no timings are reported for them.")
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
+import os
 import random
 import time
-from trip_management import TripManager
-from pricing import PricingEngine
-from feedback import FeedbackManager
-from passengers import Passenger
+from trip_management import Trip, TripManager
+from Pricing import PricingEngine
+from Feedback import FeedbackManager
+from Passengers import Passenger
 
 class Taxi:
+    leaderboards = None  # DriverLeaderboards kept current on trip completion and feedback
+
     def __init__(self, taxi_id: int, location: str, available: bool = True, driver_name: str = "Unknown"):
         self.taxi_id = taxi_id
         self.location = location
@@ -28,6 +31,9 @@ class Taxi:
     def complete_trip(self):
         print(f"Taxi {self.taxi_id} completed the trip for {self.current_trip.passenger.name}")
         self.total_earnings += self.current_trip.price
+        if Taxi.leaderboards is not None:
+            Taxi.leaderboards.record_trip(self.taxi_id, self.location, self.current_trip.price)
+        self.current_trip.mark_completed()
         FeedbackManager.collect_feedback(self)
         self.available = True
         self.current_trip = None
@@ -39,16 +45,52 @@ class Taxi:
     def receive_feedback(self, feedback: int):
         self.feedback_received += 1
         self.rating = (self.rating * (self.feedback_received - 1) + feedback) / self.feedback_received
+        if Taxi.leaderboards is not None:
+            Taxi.leaderboards.record_rating(self.taxi_id, self.location, self.rating, feedback)
         print(f"Taxi {self.taxi_id} now has an average rating of {self.rating:.2f} after {self.feedback_received} feedbacks")
 
 class Dispatcher:
-    def __init__(self):
-        self.taxis = [Taxi(i, random.choice(['North', 'South', 'East', 'West']), True, f"Driver {i}") for i in range(1, 51)]
-        self.trip_manager = TripManager()
+    SECONDS_PER_KM = 120  # Expected trip pace, used to auto-complete trips nobody closes
+    AUTO_COMPLETE_GRACE = 600  # Extra seconds allowed before a trip is auto-completed
+    FLEET_SNAPSHOT_INTERVAL = 1.0  # Seconds between shared-memory fleet snapshots
+    REBALANCE_INTERVAL = 30.0  # Seconds between idle-fleet rebalancing rounds
+
+    def __init__(self, snapshot_path: str = None, deltas: list = (), journal_path: str = None):
+        # Subsystems are imported here, not at module level, so importing taxi_system stays cheap
+        from flight_recorder import FlightRecorder
+        from leaderboard import DriverLeaderboards
+        from location_ingest import LocationIngestor
+        from rebalancing import DemandForecaster, Rebalancer
+        from timing_wheel import TimingWheel
+        from trip_analytics import TripAnalytics
         self.pricing_engine = PricingEngine()
+        if snapshot_path and os.path.exists(snapshot_path):
+            from snapshot import restore
+            restore(self, snapshot_path, deltas)
+        else:
+            self.taxis = [Taxi(i, random.choice(['North', 'South', 'East', 'West']), True, f"Driver {i}") for i in range(1, 51)]
+            self.trip_manager = TripManager()
+        self.location_ingestor = LocationIngestor({taxi.taxi_id: taxi for taxi in self.taxis})
+        self.timers = TimingWheel()
+        self.leaderboards = Taxi.leaderboards = DriverLeaderboards()
+        self.leaderboards.seed_ratings(self.taxis)
+        self.analytics = Trip.analytics = TripAnalytics()
+        self.fleet_publisher = None
+        self.fleet_published_at = 0.0
+        self.flight_recorder = FlightRecorder()
+        self.last_candidate_count = 0
+        self.demand = DemandForecaster()
+        self.rebalancer = Rebalancer(self.demand)
+        self.rebalanced_at = time.monotonic()
+        if journal_path:
+            # Replay transitions made after the snapshot, then keep journaling new ones
+            from trip_journal import TripJournal
+            TripJournal.recover(self.trip_manager, self.taxis, journal_path)
+            TripJournal.open(journal_path)
 
     def find_nearest_taxi(self, location: str):
         available_taxis = [taxi for taxi in self.taxis if taxi.available and taxi.location == location]
+        self.last_candidate_count = len(available_taxis)
         if available_taxis:
             return random.choice(available_taxis)
         else:
@@ -56,19 +98,72 @@ class Dispatcher:
             return None
 
     def dispatch_taxi(self, trip):
-        taxi = self.find_nearest_taxi(trip.passenger.pickup_location)
-        if taxi:
-            taxi.assign_trip(trip)
-        else:
-            print(f"No taxis available for trip {trip.trip_id}")
-            trip.mark_failed()
-        return taxi
+        self.demand.record(trip.passenger.pickup_location)
+        record = self.flight_recorder.begin(trip.trip_id, trip.passenger.pickup_location)
+        taxi = None
+        try:
+            taxi = self.find_nearest_taxi(trip.passenger.pickup_location)
+            record.mark("find_nearest_taxi")
+            if taxi:
+                taxi.assign_trip(trip)
+                record.mark("assign_trip")
+                deadline = trip.distance * Dispatcher.SECONDS_PER_KM + Dispatcher.AUTO_COMPLETE_GRACE
+                trip.timeout = self.timers.schedule(deadline, self.auto_complete_trip, taxi, trip)
+                record.mark("schedule_timeout")
+            else:
+                print(f"No taxis available for trip {trip.trip_id}")
+                trip.mark_failed()
+                record.mark("mark_failed")
+            return taxi
+        finally:
+            # Also on an exception, so the profiler is disabled and the failing dispatch is recorded
+            self.flight_recorder.finish(record, candidates=self.last_candidate_count,
+                                        taxi_id=taxi.taxi_id if taxi else None)
 
     def complete_trip(self, taxi: Taxi):
+        timeout = getattr(taxi.current_trip, "timeout", None)
+        if timeout is not None:
+            self.timers.cancel(timeout)
         taxi.complete_trip()
 
+    def auto_complete_trip(self, taxi: Taxi, trip):
+        if taxi.current_trip is trip:
+            print(f"Trip {trip.trip_id} was not closed in time and is being auto-completed")
+            taxi.complete_trip()
+
+    def ingest_locations(self, pings):
+        """Queue (taxi_id, timestamp, location) GPS pings; they take effect on the next tick."""
+        self.location_ingestor.submit(pings)
+
+    def enable_fleet_snapshot(self, name: str, capacity: int = None):
+        """Publish the fleet to shared memory segment `name` for read-only worker processes."""
+        from fleet_shm import FleetSnapshotPublisher
+        self.fleet_publisher = FleetSnapshotPublisher(name, capacity or len(self.taxis))
+        self.fleet_publisher.publish(self.taxis)
+        self.fleet_published_at = time.monotonic()
+        return self.fleet_publisher
+
+    def tick(self, now: float = None):
+        """Run the dispatcher's periodic work: apply location updates, fire due timers, apply queued
+        feedback, rebalance and publish the fleet."""
+        self.location_ingestor.apply()
+        self.timers.advance(now)
+        # Ratings change here, on the dispatch thread, so snapshots and leaderboards see consistent taxis
+        from feedback_pipeline import FeedbackPipeline
+        FeedbackPipeline.drain_active()
+        current = time.monotonic()
+        if current - self.rebalanced_at >= Dispatcher.REBALANCE_INTERVAL:
+            self.rebalancer.rebalance(self.taxis)
+            self.rebalanced_at = current
+        if self.fleet_publisher is not None:
+            if current - self.fleet_published_at >= Dispatcher.FLEET_SNAPSHOT_INTERVAL:
+                self.fleet_publisher.publish(self.taxis)
+                self.fleet_published_at = current
+
 def main():
+    from feedback_pipeline import FeedbackPipeline
     dispatcher = Dispatcher()
+    FeedbackPipeline.start()
     passengers = [
         Passenger("Alice", "North", "South"),
         Passenger("Bob", "East", "West"),
@@ -78,14 +173,22 @@ def main():
 
     # Passengers request taxis
     for passenger in passengers:
-        trip = passenger.request_taxi()
+        # Passenger.request_taxi builds a Passengers.Trip, which the Dispatcher cannot assign
+        print(f"{passenger.name} is requesting a taxi from {passenger.pickup_location} to {passenger.destination}")
+        trip = Trip(random.randint(1000, 9999), passenger, passenger.pickup_location, passenger.destination)
+        passenger.current_trip = trip
         dispatcher.trip_manager.start_trip(trip, dispatcher)
     
     # Simulate trips being completed
     for taxi in dispatcher.taxis:
         if taxi.current_trip:
             time.sleep(1)
+            dispatcher.tick()  # Apply location updates and fire due deadlines, as the service loop would
             dispatcher.complete_trip(taxi)
+    FeedbackPipeline.stop()
+    from Logging_Module import Logger, TaxiApplication
+    TaxiApplication(dispatcher.analytics).generate_report()
+    Logger.flush_suppressed()  # Report rate-limited pricing lines still pending at shutdown
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,114 @@
+import time
+
+# Define constants for the timing wheel
+TICK = 0.1  # Seconds per tick
+WHEEL_BITS = 8  # 256 slots per level
+LEVELS = 4  # 256 ** 4 ticks of 0.1 s covers about 13 years
+
+class Timer:
+    """Handle for a scheduled callback; pass it to TimingWheel.cancel to cancel."""
+
+    __slots__ = ("expiry", "callback", "args", "bucket")
+
+    def __init__(self, expiry: int, callback, args: tuple):
+        self.expiry = expiry
+        self.callback = callback
+        self.args = args
+        self.bucket = None  # The slot dict currently holding this timer
+
+    @property
+    def active(self):
+        return self.bucket is not None
+
+class TimingWheel:
+    """Hierarchical timing wheel for large numbers of trip deadlines.
+
+    Level 0 has one slot per tick; each higher level covers 256 times the
+    span of the one below. Timers far in the future sit in a coarse slot and
+    are cascaded down as time approaches them, so scheduling and cancelling
+    are O(1) and advancing a tick only touches the slot that is due. Nothing
+    runs on its own thread: the dispatcher loop calls `advance`.
+    """
+
+    def __init__(self, tick: float = TICK, wheel_bits: int = WHEEL_BITS, levels: int = LEVELS, now: float = None):
+        self.tick = tick
+        self.wheel_bits = wheel_bits
+        self.mask = (1 << wheel_bits) - 1
+        self.levels = levels
+        self.wheels = [[{} for _ in range(1 << wheel_bits)] for _ in range(levels)]
+        self.start = time.monotonic() if now is None else now
+        self.current_tick = 0
+        self.due = {}  # Timers scheduled at or before the current tick
+        self.count = 0
+
+    def _tick_for(self, when: float):
+        return int((when - self.start) / self.tick)
+
+    def schedule(self, delay: float, callback, *args, now: float = None):
+        """Run callback(*args) once `delay` seconds from now; returns a Timer."""
+        now = time.monotonic() if now is None else now
+        expiry = max(self._tick_for(now + delay), self.current_tick)
+        timer = Timer(expiry, callback, args)
+        self._insert(timer)
+        self.count += 1
+        return timer
+
+    def cancel(self, timer: Timer):
+        """Cancel a pending timer; returns False if it already fired or was cancelled."""
+        if timer.bucket is None:
+            return False
+        del timer.bucket[timer]
+        timer.bucket = None
+        self.count -= 1
+        return True
+
+    def _insert(self, timer: Timer):
+        delta = timer.expiry - self.current_tick
+        if delta <= 0:
+            bucket = self.due
+        else:
+            level = 0
+            while level < self.levels - 1 and delta >> (self.wheel_bits * (level + 1)):
+                level += 1
+            # Timers beyond the top level's span wait in its furthest slot and are re-cascaded
+            expiry = min(timer.expiry, self.current_tick + (1 << (self.wheel_bits * self.levels)) - 1)
+            bucket = self.wheels[level][(expiry >> (self.wheel_bits * level)) & self.mask]
+        bucket[timer] = None
+        timer.bucket = bucket
+
+    def _cascade(self, level: int):
+        slot = (self.current_tick >> (self.wheel_bits * level)) & self.mask
+        bucket = self.wheels[level][slot]
+        if bucket:
+            self.wheels[level][slot] = {}
+            for timer in bucket:
+                self._insert(timer)
+
+    def advance(self, now: float = None):
+        """Fire every timer whose deadline has passed; returns the number fired."""
+        target = self._tick_for(time.monotonic() if now is None else now)
+        fired = self._fire(self.due)
+        while self.current_tick < target:
+            self.current_tick += 1
+            for level in range(1, self.levels):
+                if self.current_tick & ((1 << (self.wheel_bits * level)) - 1):
+                    break
+                self._cascade(level)
+            fired += self._fire(self.wheels[0][self.current_tick & self.mask])
+            fired += self._fire(self.due)
+        return fired
+
+    def _fire(self, bucket: dict):
+        if not bucket:
+            return 0
+        timers = list(bucket)
+        bucket.clear()
+        for timer in timers:
+            timer.bucket = None
+        self.count -= len(timers)
+        for timer in timers:
+            timer.callback(*timer.args)
+        return len(timers)
+
+    def __len__(self):
+        return self.count
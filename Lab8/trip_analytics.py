@@ -0,0 +1,185 @@
+import os
+import time
+from array import array
+from collections import defaultdict
+
+try:
+    import numpy as np
+except ImportError:  # Aggregations fall back to pure Python loops
+    np = None
+
+# Define constants for the columnar store
+CHUNK_ROWS = 1 << 20  # Rows per chunk; full chunks are immutable and can be saved as files
+NO_RATING = 0
+COLUMNS = [
+    ("driver", "i"),  # Dictionary-encoded driver name
+    ("zone", "i"),  # Dictionary-encoded pickup zone
+    ("hour", "q"),  # Hours since the epoch
+    ("fare", "d"),
+    ("rating", "b"),  # 1-5, or NO_RATING
+    ("failed", "b"),
+]
+
+class _Dictionary:
+    """Maps repeated strings (drivers, zones) to dense integer codes."""
+
+    def __init__(self, values: list = ()):
+        self.values = list(values)
+        self.codes = {value: code for code, value in enumerate(self.values)}
+
+    def encode(self, value: str):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+class TripAnalytics:
+    """Columnar store of completed and failed trips with incrementally refreshed aggregates.
+
+    Trips are appended into fixed-size chunks of typed arrays, one per column.
+    `refresh` folds only the rows added since the previous refresh into the
+    running aggregates, using NumPy group-bys when it is installed, so reports
+    over tens of millions of trips do not rescan history.
+    """
+
+    def __init__(self):
+        self.drivers = _Dictionary()
+        self.zones = _Dictionary()
+        self.chunks = []
+        self.rows = 0
+        self.refreshed_rows = 0
+        self.revenue = defaultdict(float)  # (driver code, hour) -> revenue
+        self.zone_trips = defaultdict(int)
+        self.zone_failures = defaultdict(int)
+        self.ratings = [0] * 6  # Index 1-5 counts ratings; index 0 is unused
+
+    def _new_chunk(self):
+        chunk = {name: array(code) for name, code in COLUMNS}
+        self.chunks.append(chunk)
+        return chunk
+
+    def add(self, driver: str, zone: str, timestamp: float, fare: float, rating: int = None, failed: bool = False):
+        """Append one trip; returns its row number for a later `set_rating`."""
+        chunk = self.chunks[-1] if self.chunks and len(self.chunks[-1]["hour"]) < CHUNK_ROWS else self._new_chunk()
+        chunk["driver"].append(self.drivers.encode(driver or "Unassigned"))
+        chunk["zone"].append(self.zones.encode(zone))
+        chunk["hour"].append(int(timestamp // 3600))
+        chunk["fare"].append(fare)
+        chunk["rating"].append(rating or NO_RATING)
+        chunk["failed"].append(1 if failed else 0)
+        self.rows += 1
+        return self.rows - 1
+
+    def add_trip(self, trip, timestamp: float = None):
+        """Materialize a trip object from any of the trip classes into the columns."""
+        taxi = getattr(trip, "taxi", None) or getattr(trip, "driver", None)
+        driver = getattr(taxi, "driver_name", None) or getattr(taxi, "name", None)
+        zone = getattr(trip, "pickup_location", None) or trip.passenger.pickup_location
+        fare = getattr(trip, "price", None) or getattr(trip, "fare", 0.0)
+        failed = trip.status in ("Failed", "failed")
+        return self.add(driver, zone, time.time() if timestamp is None else timestamp, fare,
+                        getattr(trip, "rating", None), failed)
+
+    def set_rating(self, row: int, rating: int):
+        """Record a rating that arrived after its trip was added, e.g. from asynchronous feedback."""
+        chunk, index = self.chunks[row // CHUNK_ROWS], row % CHUNK_ROWS
+        previous = chunk["rating"][index]
+        chunk["rating"][index] = rating or NO_RATING
+        if row < self.refreshed_rows and not chunk["failed"][index]:
+            # Already folded into the aggregates: move the count instead of rescanning
+            self.ratings[previous] -= 1
+            self.ratings[rating or NO_RATING] += 1
+
+    def _segments(self, start: int):
+        """Yield (chunk, first row, last row) for rows from `start` to the end."""
+        for index, chunk in enumerate(self.chunks):
+            chunk_start = index * CHUNK_ROWS
+            chunk_end = chunk_start + len(chunk["hour"])
+            if chunk_end > start:
+                yield chunk, max(start - chunk_start, 0), chunk_end - chunk_start
+
+    def refresh(self):
+        """Fold rows appended since the last refresh into the aggregates; returns rows processed."""
+        start, end = self.refreshed_rows, self.rows
+        for chunk, first, last in self._segments(start):
+            if np is not None:
+                self._aggregate_numpy(chunk, first, last)
+            else:
+                self._aggregate_python(chunk, first, last)
+        self.refreshed_rows = end
+        return end - start
+
+    def _aggregate_python(self, chunk: dict, first: int, last: int):
+        revenue, zone_trips, zone_failures, ratings = self.revenue, self.zone_trips, self.zone_failures, self.ratings
+        columns = [chunk[name][first:last] for name, _ in COLUMNS]
+        for driver, zone, hour, fare, rating, failed in zip(*columns):
+            zone_trips[zone] += 1
+            if failed:
+                zone_failures[zone] += 1
+                continue
+            revenue[driver, hour] += fare
+            ratings[rating] += 1
+
+    def _aggregate_numpy(self, chunk: dict, first: int, last: int):
+        column = {name: np.frombuffer(chunk[name], dtype=np.dtype(code))[first:last] for name, code in COLUMNS}
+        zone_counts = np.bincount(column["zone"], minlength=len(self.zones.values))
+        failed = column["failed"].astype(bool)
+        failure_counts = np.bincount(column["zone"][failed], minlength=len(self.zones.values))
+        for zone in np.flatnonzero(zone_counts):
+            self.zone_trips[int(zone)] += int(zone_counts[zone])
+            self.zone_failures[int(zone)] += int(failure_counts[zone])
+        completed = ~failed
+        keys = (column["driver"][completed].astype(np.int64) << 32) | (column["hour"][completed] & 0xFFFFFFFF)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        sums = np.bincount(inverse, weights=column["fare"][completed])
+        for key, total in zip(unique_keys.tolist(), sums.tolist()):
+            self.revenue[key >> 32, key & 0xFFFFFFFF] += total
+        rating_counts = np.bincount(column["rating"][completed], minlength=6)
+        for rating in range(6):
+            self.ratings[rating] += int(rating_counts[rating])
+
+    def revenue_per_driver_hour(self):
+        """Return {(driver name, hour start as epoch seconds): revenue}."""
+        self.refresh()
+        return {(self.drivers.values[driver], hour * 3600): total for (driver, hour), total in self.revenue.items()}
+
+    def fail_rate_per_zone(self):
+        self.refresh()
+        return {self.zones.values[zone]: self.zone_failures[zone] / count
+                for zone, count in self.zone_trips.items() if count}
+
+    def rating_distribution(self):
+        """Return {rating: count} for rated, completed trips."""
+        self.refresh()
+        return {rating: self.ratings[rating] for rating in range(1, 6)}
+
+    def save(self, directory: str):
+        """Write each column of each chunk to its own file, plus the string dictionaries."""
+        os.makedirs(directory, exist_ok=True)
+        for index, chunk in enumerate(self.chunks):
+            for name, _ in COLUMNS:
+                with open(os.path.join(directory, f"chunk{index:05d}.{name}"), "wb") as handle:
+                    chunk[name].tofile(handle)
+        for label, dictionary in (("drivers", self.drivers), ("zones", self.zones)):
+            with open(os.path.join(directory, f"{label}.txt"), "w", encoding="utf-8") as handle:
+                handle.write("\n".join(dictionary.values))
+
+    @staticmethod
+    def load(directory: str):
+        """Load chunks written by `save`; aggregates are rebuilt on the next refresh."""
+        analytics = TripAnalytics()
+        for label in ("drivers", "zones"):
+            with open(os.path.join(directory, f"{label}.txt"), "r", encoding="utf-8") as handle:
+                content = handle.read()
+            setattr(analytics, label, _Dictionary(content.split("\n") if content else []))
+        index = 0
+        while os.path.exists(os.path.join(directory, f"chunk{index:05d}.hour")):
+            chunk = analytics._new_chunk()
+            for name, code in COLUMNS:
+                path = os.path.join(directory, f"chunk{index:05d}.{name}")
+                with open(path, "rb") as handle:
+                    chunk[name].fromfile(handle, os.path.getsize(path) // array(code).itemsize)
+            analytics.rows += len(chunk["hour"])
+            index += 1
+        return analytics
@@ -0,0 +1,243 @@
+import os
+import struct
+import threading
+import time
+import zlib
+
+# Define constants for journal configuration
+JOURNAL_FILE = "trips.journal"
+MAX_BATCH = 1024  # Flush as soon as this many transitions are pending
+MAX_DELAY = 0.005  # Otherwise flush at most 5 ms after the first pending transition
+
+# Record layout: crc32 | journal key | trip_id | taxi_id | kind | payload length, followed by
+# the payload. The journal key is unique per Trip object (trip IDs are not) and is also
+# stored in snapshots, so recovery matches records to exactly one trip. A TRANSITION payload is the new status; a CREATED payload is price and distance followed
+# by the NUL-separated passenger name, pickup and destination, so trips created after the
+# last snapshot can be rebuilt. The CRC covers everything after itself, so a torn write at
+# the tail is detected on replay.
+RECORD = struct.Struct("<IqqqBH")
+CREATED_FIELDS = struct.Struct("<dd")
+TRANSITION, CREATED = 0, 1
+NO_TAXI = -1
+
+class TripJournal:
+    """Write-ahead journal of trip state transitions with group commit.
+
+    Transitions are appended to an in-memory batch and a background thread
+    writes and fsyncs the whole batch at once, so many trips share one fsync.
+    Callers that must not proceed before a transition is durable can `wait`
+    for the sequence number returned by `record`.
+    """
+
+    active = None  # Journal trip_management.Trip writes to, set with TripJournal.open()
+
+    def __init__(self, path: str = JOURNAL_FILE, max_batch: int = MAX_BATCH, max_delay: float = MAX_DELAY):
+        self.path = path
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.file = open(path, "ab")
+        self.pending = []
+        self.next_sequence = 0
+        self.durable_sequence = 0
+        self.flush_count = 0
+        self.closed = False
+        self.lock = threading.Condition()
+        self.flusher = threading.Thread(target=self._flush_loop, name="trip-journal", daemon=True)
+        self.flusher.start()
+
+    @staticmethod
+    def open(path: str = JOURNAL_FILE, **options):
+        """Open a journal and make it the one Trip state changes are written to."""
+        from trip_management import Trip
+        TripJournal.active = Trip.journal = TripJournal(path, **options)
+        return TripJournal.active
+
+    def record(self, trip):
+        """Journal a trip's current status and taxi; returns the sequence number to `wait` on."""
+        taxi_id = trip.taxi.taxi_id if trip.taxi else NO_TAXI
+        return self._append(TRANSITION, trip.journal_key, trip.trip_id, taxi_id, trip.status.encode("utf-8"))
+
+    def record_creation(self, trip):
+        """Journal a new trip with everything needed to rebuild it."""
+        names = "\0".join((trip.passenger.name, trip.pickup_location, trip.destination))
+        payload = CREATED_FIELDS.pack(trip.price, trip.distance) + names.encode("utf-8")
+        return self._append(CREATED, trip.journal_key, trip.trip_id, NO_TAXI, payload)
+
+    def _append(self, kind: int, key: int, trip_id: int, taxi_id: int, payload: bytes):
+        body = RECORD.pack(0, key, trip_id, taxi_id, kind, len(payload))[4:] + payload
+        entry = struct.pack("<I", zlib.crc32(body)) + body
+        with self.lock:
+            if self.closed:
+                raise ValueError("Trip journal is closed")
+            self.pending.append(entry)
+            self.next_sequence += 1
+            if len(self.pending) == 1 or len(self.pending) >= self.max_batch:
+                self.lock.notify_all()
+            return self.next_sequence
+
+    def wait(self, sequence: int, timeout: float = None):
+        """Block until the transition with this sequence number has been fsynced."""
+        with self.lock:
+            return self.lock.wait_for(lambda: self.durable_sequence >= sequence, timeout)
+
+    def _flush_loop(self):
+        while True:
+            with self.lock:
+                self.lock.wait_for(lambda: self.pending or self.closed)
+                if not self.pending and self.closed:
+                    return
+                deadline = time.monotonic() + self.max_delay
+                while len(self.pending) < self.max_batch and not self.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.lock.wait(remaining)
+                batch, self.pending = self.pending, []
+                sequence = self.next_sequence
+            # Write and fsync outside the lock so new transitions keep queueing.
+            self.file.write(b"".join(batch))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            with self.lock:
+                self.durable_sequence = sequence
+                self.flush_count += 1
+                self.lock.notify_all()
+
+    def checkpoint(self):
+        """Discard journaled records once a snapshot has captured them.
+
+        Call it right after the snapshot is written, from the thread that changes
+        trips, so no transition falls between the snapshot and the truncation.
+        """
+        with self.lock:
+            self.lock.wait_for(lambda: not self.pending and self.durable_sequence == self.next_sequence)
+            self.file.truncate(0)
+            self.file.seek(0)
+            os.fsync(self.file.fileno())
+
+    @staticmethod
+    def checkpoint_active():
+        if TripJournal.active is not None:
+            TripJournal.active.checkpoint()
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.lock.notify_all()
+        self.flusher.join()
+        self.file.close()
+        if TripJournal.active is self:
+            from trip_management import Trip
+            TripJournal.active = Trip.journal = None
+
+    @staticmethod
+    def replay(path: str = JOURNAL_FILE):
+        """Read a journal and return the final state of every trip it mentions.
+
+        Returns a list of [key, trip_id, status, taxi_id, details] in journal
+        order, one per journal key. `details` is (passenger, pickup, destination,
+        price, distance) for trips created after the last checkpoint and None for
+        trips that came from the snapshot.
+
+        Replay stops at the first torn or corrupt record, which can only be the
+        tail of an interrupted flush, and truncates the file back to the last
+        complete record so later appends start from a clean boundary.
+        """
+        entries = []
+        if not os.path.exists(path):
+            return entries
+        latest = {}
+        with open(path, "r+b") as handle:
+            data = handle.read()
+            offset = 0
+            while offset + RECORD.size <= len(data):
+                crc, key, trip_id, taxi_id, kind, length = RECORD.unpack_from(data, offset)
+                end = offset + RECORD.size + length
+                if end > len(data) or zlib.crc32(data[offset + 4:end]) != crc:
+                    break
+                payload = data[offset + RECORD.size:end]
+                if kind == CREATED:
+                    price, distance = CREATED_FIELDS.unpack_from(payload)
+                    passenger, pickup, destination = payload[CREATED_FIELDS.size:].decode("utf-8").split("\0")
+                    entry = [key, trip_id, "Pending", NO_TAXI, (passenger, pickup, destination, price, distance)]
+                    entries.append(entry)
+                    latest[key] = entry
+                else:
+                    entry = latest.get(key)
+                    if entry is None:
+                        entry = latest[key] = [key, trip_id, None, NO_TAXI, None]
+                        entries.append(entry)
+                    entry[2], entry[3] = payload.decode("utf-8"), taxi_id
+                offset = end
+            if offset < len(data):
+                print(f"Trip journal {path}: discarding {len(data) - offset} bytes of incomplete records.")
+                handle.truncate(offset)
+        return entries
+
+    @staticmethod
+    def recover(trip_manager, taxis: list = (), path: str = JOURNAL_FILE):
+        """Re-apply journaled records to a TripManager after a restart.
+
+        Trips that came from the snapshot, in the trip lists or held by a taxi,
+        are updated in place; trips created after it are rebuilt and added to `trips` or `failed_trips`. Trips still
+        Pending were mid-dispatch when the process stopped and are left out.
+        `taxis` lets assigned trips be re-linked to their taxi. Returns the
+        number of trips updated or rebuilt.
+        """
+        entries = TripJournal.replay(path)
+        if not entries:
+            return 0
+        from trip_management import Trip
+        from Passengers import Passenger
+        existing = {entry[0]: entry for entry in entries if entry[4] is None}
+        taxis_by_id = {taxi.taxi_id: taxi for taxi in taxis}
+        recovered = 0
+        # Trips streamed by RequestIntake are in no list, only on their taxi
+        carried = [taxi.current_trip for taxi in taxis if taxi.current_trip is not None]
+        for trips in (trip_manager.trips, trip_manager.failed_trips, carried):
+            if hasattr(trips, "slots_for"):
+                # Lazily restored snapshot lists: only build the trips the journal touched.
+                trips = [trips[slot] for slot in trips.slots_for(existing)]
+            for trip in trips:
+                # Popped so a trip reachable both from a list and from its taxi is applied once
+                entry = existing.pop(getattr(trip, "journal_key", None), None)
+                if entry is not None:
+                    TripJournal._apply(trip, entry[2], taxis_by_id.get(entry[3]))
+                    recovered += 1
+        for key, trip_id, status, taxi_id, details in entries:
+            if details is None or status == "Pending":
+                continue
+            name, pickup, destination, price, distance = details
+            trip = Trip.__new__(Trip)
+            passenger = Passenger.__new__(Passenger)
+            passenger.__dict__.update(name=name, pickup_location=pickup, destination=destination,
+                                      current_trip=trip, feedback_given=False)
+            trip.__dict__.update(trip_id=trip_id, journal_key=key, passenger=passenger, pickup_location=pickup,
+                                 destination=destination, taxi=None, price=price, status=None,
+                                 distance=distance)
+            TripJournal._apply(trip, status, taxis_by_id.get(taxi_id))
+            if status == "Failed":
+                trip_manager.failed_trips.append(trip)
+            else:
+                trip_manager.trips.append(trip)
+            recovered += 1
+        return recovered
+
+    @staticmethod
+    def _apply(trip, status: str, taxi):
+        previous, trip.status = trip.status, status
+        if taxi is not None:
+            trip.taxi = taxi
+        taxi = trip.taxi
+        if taxi is None:
+            return
+        if status == "In Progress":
+            taxi.current_trip = trip
+            taxi.available = False
+            return
+        if status == "Completed" and previous != "Completed":
+            # Completed after the snapshot, so its fare is not in the snapshot's earnings yet
+            taxi.total_earnings += trip.price
+        if taxi.current_trip is trip:
+            taxi.current_trip = None
+            taxi.available = True
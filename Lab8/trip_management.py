@@ -1,27 +1,56 @@
-from pricing import PricingEngine
+import os
+import random
+from Pricing import PricingEngine
 
 class Trip:
+    analytics = None  # TripAnalytics fed as trips complete or fail, set by the Dispatcher
+    journal = None  # TripJournal recording state changes, set by TripJournal.open()
+
     def __init__(self, trip_id: int, passenger, pickup_location: str, destination: str):
         self.trip_id = trip_id
+        self.journal_key = int.from_bytes(os.urandom(8), "little", signed=True)  # Trip IDs repeat; the journal matches on this
         self.passenger = passenger
         self.pickup_location = pickup_location
         self.destination = destination
         self.taxi = None
-        self.price = PricingEngine.calculate_fare(self.pickup_location, self.destination)
+        self.price = PricingEngine.calculate_fare(self.pickup_location, self.destination,
+                                                user_id=passenger.user_id)
         self.status = "Pending"
+        self.rating = None
+        self.analytics_row = None  # Row in Trip.analytics, once the trip completed or failed
         self.distance = self.calculate_distance()
+        if Trip.journal is not None:
+            Trip.journal.record_creation(self)
 
     def assign_taxi(self, taxi):
         self.taxi = taxi
         self.status = "In Progress"
+        self.journal_transition()
 
     def mark_completed(self):
         self.status = "Completed"
+        self.journal_transition()
+        if Trip.analytics is not None:
+            self.analytics_row = Trip.analytics.add_trip(self)
 
     def mark_failed(self):
         self.status = "Failed"
+        self.journal_transition()
+        if Trip.analytics is not None:
+            self.analytics_row = Trip.analytics.add_trip(self)
         print(f"Trip {self.trip_id} failed to find a taxi.")
 
+    def journal_transition(self):
+        if Trip.journal is not None:
+            Trip.journal.record(self)
+
+    def record_rating(self, rating: int):
+        """Store the passenger's rating, updating the trip's analytics row if it has one."""
+        self.rating = rating
+        row = getattr(self, "analytics_row", None)
+        if Trip.analytics is not None and row is not None:
+            Trip.analytics.set_rating(row, rating)
+
     def calculate_distance(self):
         # Simulating distance calculation
         distances = {